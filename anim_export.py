@@ -0,0 +1,164 @@
+# Export a matplotlib animation by streaming raw frames to an encoder.
+#
+# The figure is drawn on an Agg canvas on the calling thread, and each frame's RGBA buffer
+# goes through a bounded queue to an encoder thread, so encoding overlaps drawing. Frames
+# are written to the stdin of an ffmpeg process (.mp4, .webm, .mkv, ...) or fed to
+# Pillow's GIF writer (.gif); no intermediate image files are written. Scripts use it as
+#
+#     if args.export:
+#         export(fig, update, frames, args.export, fps=20)
+#     else:
+#         plt.show()
+import itertools
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+_DONE = object()
+
+
+def add_export_argument(parser):
+    parser.add_argument("--export", metavar="OUT",
+                        help="write the animation to OUT (.gif via Pillow, anything else via ffmpeg) "
+                             "instead of showing it")
+    parser.add_argument("--fps", type=int, default=None, help="frame rate of the exported file")
+
+
+def peak_rss_bytes():
+    # Peak resident set size of this process, or None where there is no resource module
+    # (Windows). ru_maxrss is in bytes on macOS and in kilobytes on Linux and the BSDs.
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def ffmpeg_command(out, size, fps, ffmpeg="ffmpeg"):
+    width, height = size
+    return [ffmpeg, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+            # yuv420p (what players expect) needs even dimensions
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", out]
+
+
+class PipeWriter:
+    # Raw RGBA frames into the stdin of an encoder process
+    def __init__(self, command):
+        self.command = command
+
+    def consume(self, frames):
+        process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE)
+        try:
+            for size, rgba in frames:
+                process.stdin.write(rgba)
+        finally:
+            process.stdin.close()
+            error = process.stderr.read().decode(errors="replace").strip()
+            status = process.wait()
+            if status:
+                raise RuntimeError(f"{self.command[0]} exited with status {status}: {error}")
+
+
+class GifWriter:
+    # Pillow takes the frames as an iterator, converting each to a palette image. It keeps
+    # every palette frame (one byte per pixel) until the file is finished.
+    def __init__(self, out, fps):
+        self.out = out
+        self.fps = fps
+
+    def consume(self, frames):
+        from PIL import Image
+        images = (Image.frombuffer("RGBA", size, rgba, "raw", "RGBA", 0, 1).convert("RGB")
+                  for size, rgba in frames)
+        next(images).save(self.out, save_all=True, append_images=images, duration=1000 / self.fps, loop=0)
+
+
+def open_writer(out, size, fps, encoder=None):
+    # encoder: an argv list to pipe frames into instead of the default for out
+    if encoder:
+        return PipeWriter(encoder)
+    if out.lower().endswith(".gif"):
+        return GifWriter(out, fps)
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError(f"exporting {out} needs ffmpeg on PATH (or export a .gif)")
+    return PipeWriter(ffmpeg_command(out, size, fps))
+
+
+def export(fig, update, frames, out, fps=20, init=None, queue_size=8, encoder=None, progress=True):
+    # Calls init() once (if given) and update(frame) for each frame, like FuncAnimation,
+    # drawing each frame on an Agg canvas. Returns a dict of timing and memory figures.
+    if isinstance(frames, int):
+        frames = range(frames)
+    frames = list(frames)
+    canvas = FigureCanvasAgg(fig)
+    if init is not None:
+        init()
+    # Artists marked animated for blitting are skipped by a plain draw(); there is no
+    # blitting here, so draw them like everything else
+    for artist in fig.findobj(lambda artist: artist.get_animated()):
+        artist.set_animated(False)
+    buffers = queue.Queue(maxsize=queue_size)
+    errors = []
+
+    def encode():
+        frames = iter(buffers.get, _DONE)
+        try:
+            first = next(frames)
+            writer = open_writer(out, first[0], fps, encoder)
+            writer.consume(itertools.chain([first], frames))
+        except StopIteration:
+            pass
+        except BaseException as error:
+            errors.append(error)
+            for _ in frames:
+                pass  # Keep draining so the render loop never blocks on a dead writer
+
+    thread = threading.Thread(target=encode, daemon=True)
+    thread.start()
+    start = time.perf_counter()
+    render = 0.0
+    frame_bytes = 0
+    try:
+        for i, frame in enumerate(frames, 1):
+            if errors:
+                break
+            t = time.perf_counter()
+            update(frame)
+            canvas.draw()
+            size = canvas.get_width_height()
+            rgba = bytes(canvas.buffer_rgba())
+            frame_bytes = len(rgba)
+            render += time.perf_counter() - t
+            buffers.put((size, rgba))
+            if progress:
+                print(f"\r{i}/{len(frames)} frames", end="", file=sys.stderr, flush=True)
+    finally:
+        buffers.put(_DONE)
+        thread.join()
+        if progress:
+            print(file=sys.stderr)
+    if errors:
+        raise errors[0]
+    elapsed = time.perf_counter() - start
+    stats = {
+        "frames": len(frames), "seconds": elapsed, "fps": len(frames) / elapsed,
+        "render_seconds": render, "frame_bytes": frame_bytes,
+        # Frames in flight: the queue, plus one being drawn and one being encoded
+        "queue_ceiling_bytes": (queue_size + 2) * frame_bytes,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+    if progress:
+        peak = stats["peak_rss_bytes"]
+        print(f"{stats['frames']} frames to {out} in {elapsed:.1f}s: {stats['fps']:.2f} frames/sec "
+              f"({render:.1f}s drawing, encoding overlapped); frame queue ceiling "
+              f"{stats['queue_ceiling_bytes'] / 2 ** 20:.1f} MiB, peak RSS "
+              f"{'unknown' if peak is None else f'{peak / 2 ** 20:.0f} MiB'}")
+    return stats
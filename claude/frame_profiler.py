@@ -0,0 +1,139 @@
+import json
+import os
+from collections import deque
+from time import perf_counter
+
+# Overlay colours, cycled over phases in the order they are first seen
+PHASE_COLORS = [(230, 25, 75), (60, 180, 75), (255, 225, 25), (0, 130, 200), (245, 130, 48),
+                (145, 30, 180), (70, 240, 240), (240, 50, 230), (210, 245, 60), (250, 190, 190),
+                (170, 110, 40), (128, 128, 128)]
+
+
+# Per-phase frame timer. The frame is cut into consecutive phases: mark(name) charges the
+# time since the previous mark to name, and a phase marked several times in one frame
+# (e.g. once per fixed-timestep tick) is summed. Owners keep a None profiler when
+# profiling is off, so the disabled cost is one truth test per phase.
+class FrameProfiler:
+    def __init__(self, window=300, trace=False, idle=("wait",)):
+        self.window = window
+        self.idle = set(idle)
+        self.phases = {}  # name -> deque of per-frame ms, the last `window` frames
+        self.busy = deque(maxlen=window)
+        self.current = {}
+        self.frames = 0
+        self.trace = [] if trace else None
+        self._start = self._last = self._frame_start = perf_counter()
+
+    def begin_frame(self):
+        self._frame_start = self._last = perf_counter()
+        self.current.clear()
+
+    def mark(self, name):
+        now = perf_counter()
+        elapsed = now - self._last
+        self.current[name] = self.current.get(name, 0.0) + elapsed
+        if self.trace is not None:
+            self.trace.append((name, self._last, elapsed))
+        self._last = now
+
+    def end_frame(self):
+        busy = 0.0
+        phases = self.phases
+        for name, seconds in self.current.items():
+            history = phases.get(name)
+            if history is None:
+                # Phases first seen late are padded so every history lines up with busy
+                history = phases[name] = deque([0.0] * len(self.busy), maxlen=self.window)
+            history.append(seconds * 1000)
+            if name not in self.idle:
+                busy += seconds
+        for name, history in phases.items():
+            if name not in self.current:
+                history.append(0.0)
+        self.busy.append(busy * 1000)
+        if self.trace is not None:
+            self.trace.append(("frame", self._frame_start, perf_counter() - self._frame_start))
+        self.frames += 1
+
+    def percentiles(self, quantiles=(0.5, 0.95, 0.99)):
+        # {phase: [p50, p95, p99]} in ms over the window, plus "busy" for the frame minus idle phases
+        table = {}
+        for name, history in list(self.phases.items()) + [("busy", self.busy)]:
+            values = sorted(history)
+            if values:
+                table[name] = [values[min(len(values) - 1, int(q * len(values)))] for q in quantiles]
+        return table
+
+    def report(self):
+        lines = [f"{'phase':14s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s}"]
+        for name, (p50, p95, p99) in self.percentiles().items():
+            lines.append(f"{name:14s} {p50:8.3f} {p95:8.3f} {p99:8.3f}")
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        # Chrome trace format (chrome://tracing, Perfetto): one complete event per mark,
+        # and an enclosing event per frame, in microseconds from profiler creation
+        if self.trace is None:
+            raise ValueError("profiler was created without trace=True")
+        start = self._start
+        events = [{"name": name, "ph": "X", "pid": os.getpid(), "tid": 0,
+                   "ts": (begin - start) * 1e6, "dur": seconds * 1e6}
+                  for name, begin, seconds in self.trace]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+class ProfilerOverlay:
+    # Stacked per-phase bar graph, one column per frame, scrolling left, with a line at the
+    # frame budget and a p50/p95/p99 legend refreshed every `refresh` frames (font rendering
+    # is expensive). Only the newest column is drawn each frame.
+    def __init__(self, profiler, font, x=10, y=400, width=300, height=120, budget_ms=1000 / 60,
+                 refresh=30):
+        import pygame  # The profiler itself runs without pygame
+        self.pygame = pygame
+        self.profiler = profiler
+        self.font = font
+        self.position = (x, y)
+        self.graph = pygame.Surface((width, height)).convert()
+        self.budget_ms = budget_ms
+        self.refresh = refresh
+        self.colors = {}
+        self.legend = []
+
+    def _color(self, name):
+        color = self.colors.get(name)
+        if color is None:
+            color = self.colors[name] = PHASE_COLORS[len(self.colors) % len(PHASE_COLORS)]
+        return color
+
+    def draw(self, surface):
+        # Returns the rects drawn, for dirty-rect presentation
+        pygame = self.pygame
+        profiler = self.profiler
+        graph = self.graph
+        width, height = graph.get_size()
+        scale = height / (2 * self.budget_ms)  # The budget line sits half way up
+        graph.scroll(-1, 0)
+        x = width - 1
+        pygame.draw.line(graph, (0, 0, 0), (x, 0), (x, height - 1))
+        bottom = height
+        for name, history in profiler.phases.items():
+            if name in profiler.idle or not history:
+                continue
+            h = int(history[-1] * scale)
+            if h and bottom > 0:
+                top = max(0, bottom - h)
+                pygame.draw.line(graph, self._color(name), (x, bottom - 1), (x, top))
+                bottom = top
+        graph.set_at((x, height - int(self.budget_ms * scale)), (255, 255, 255))
+        if profiler.frames % self.refresh == 0 or not self.legend:
+            self.legend = [self.font.render(f"{name} {p50:.2f}/{p95:.2f}/{p99:.2f}", True,
+                                            self._color(name) if name != "busy" else (255, 255, 255))
+                           for name, (p50, p95, p99) in profiler.percentiles().items()
+                           if name not in profiler.idle]
+        left, y = self.position
+        rects = [surface.blit(graph, (left, y))]
+        for text in self.legend:
+            rects.append(surface.blit(text, (left + width + 6, y)))
+            y += text.get_height()
+        return rects
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from viz1 import ELEVATION, build_figure
+
+# Off-screen renderer for the viz1 rotation. Each worker process builds the figure once on
+# an Agg canvas, then renders the frames it is given by moving the camera and redrawing.
+# Frames come back as raw RGBA and are handed to the writer in azimuth order.
+_figure = None
+
+
+def _init_worker(scene, particle_positions):
+    global _figure
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    _figure = build_figure(scene, particle_positions, figure)
+
+
+def render_frame(azimuth):
+    fig, ax = _figure
+    ax.view_init(elev=ELEVATION, azim=azimuth)
+    fig.canvas.draw()
+    return fig.canvas.get_width_height(), bytes(fig.canvas.buffer_rgba())
+
+
+def to_image(frame):
+    from PIL import Image
+    (width, height), rgba = frame
+    return Image.frombuffer("RGBA", (width, height), rgba, "raw", "RGBA", 0, 1).convert("RGB")
+
+
+def gif_frame(azimuth):
+    # Palette reduction is most of the cost of writing a GIF, so it is done here, in the
+    # worker, exactly as Pillow's GIF writer would do it for an RGB frame
+    from PIL import Image
+    return to_image(render_frame(azimuth)).convert("P", palette=Image.Palette.ADAPTIVE)
+
+
+def render_frames(scene, particle_positions, azimuths, workers=None, task=render_frame):
+    # Yields task(azimuth) for each azimuth, in order: (size, rgba) with the default task.
+    # workers=0 renders in this process. With workers, at most two frames per worker are
+    # in flight, which bounds memory when the writer is slower than the renderers.
+    if workers == 0:
+        _init_worker(scene, particle_positions)
+        for azimuth in azimuths:
+            yield task(azimuth)
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(scene, particle_positions)) as pool:
+        queue = iter(azimuths)
+        pending = deque(pool.submit(task, azimuth) for azimuth in islice(queue, 2 * workers))
+        while pending:
+            frame = pending.popleft().result()
+            pending.extend(pool.submit(task, azimuth) for azimuth in islice(queue, 1))
+            yield frame
+
+
+def write_gif(path, images, fps=20):
+    images = iter(images)
+    first = next(images)
+    first.save(path, save_all=True, append_images=images, duration=1000 // fps, loop=0)
+
+
+def write_pngs(directory, frames):
+    os.makedirs(directory, exist_ok=True)
+    for i, frame in enumerate(frames):
+        to_image(frame).save(os.path.join(directory, f"frame_{i:04d}.png"))
+
+
+def render(scene, particle_positions, azimuths, out, workers=None, fps=20):
+    start = time.perf_counter()
+    count = [0]
+
+    def progress(frames):
+        for frame in frames:
+            count[0] += 1
+            print(f"\r{count[0]}/{len(azimuths)} frames", end="", file=sys.stderr, flush=True)
+            yield frame
+
+    if out.lower().endswith(".gif"):
+        write_gif(out, progress(render_frames(scene, particle_positions, azimuths, workers, gif_frame)), fps)
+    else:
+        write_pngs(out, progress(render_frames(scene, particle_positions, azimuths, workers)))
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+    print(f"{count[0]} frames to {out} in {elapsed:.1f}s ({count[0] / elapsed:.2f} frames/sec)")
+
+
+def benchmark(scene, particle_positions, azimuths):
+    # Render only (no encoding), in-process first as the reference, then 1 to N workers.
+    # Each run's frames are hashed and compared with the in-process ones.
+    cores = os.cpu_count() or 1
+    counts = [0] + sorted({1, cores} | {2 ** k for k in range(1, cores.bit_length()) if 2 ** k < cores})
+    baseline = None
+    for workers in counts:
+        digest = hashlib.sha256()
+        start = time.perf_counter()
+        for size, rgba in render_frames(scene, particle_positions, azimuths, workers):
+            digest.update(rgba)
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline = elapsed, digest.digest()
+        same = "identical" if digest.digest() == baseline[1] else "MISMATCH"
+        name = "in-process" if workers == 0 else f"{workers:3d} workers"
+        print(f"{name:12s} {len(azimuths) / elapsed:7.2f} frames/sec  {baseline[0] / elapsed:5.2f}x  ({same})")
@@ -0,0 +1,164 @@
+import gc
+import random
+import sys
+import time
+
+
+# Preallocated object pool: live objects are items[:count], dead ones sit after them
+# waiting to be reused. Removal swaps with the last live object, so it is O(1) but
+# does not preserve order; iterate backwards when killing during a pass.
+class Pool:
+    def __init__(self, factory, capacity=64):
+        self.factory = factory
+        self.items = [factory() for _ in range(capacity)]
+        self.count = 0
+        self.allocations = capacity
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self.items[index]
+
+    def __iter__(self):
+        items = self.items
+        for i in range(self.count):
+            yield items[i]
+
+    def spawn(self, *args):
+        # Reuse a dead object if there is one, growing the pool only when full
+        if self.count == len(self.items):
+            self.items.append(self.factory())
+            self.allocations += 1
+        obj = self.items[self.count]
+        self.count += 1
+        obj.reset(*args)
+        return obj
+
+    def kill_at(self, index):
+        last = self.count - 1
+        items = self.items
+        items[index], items[last] = items[last], items[index]
+        self.count = last
+
+    def clear(self):
+        self.count = 0
+
+
+# Per-frame allocation and GC-pause monitor
+class FrameStats:
+    def __init__(self, pools=(), report_every=300):
+        self.pools = pools
+        self.report_every = report_every
+        self.frames = 0
+        self.blocks = 0
+        self.collections = 0
+        self.pause = 0.0
+        self.max_pause = 0.0
+        self._gc_start = None
+        self._last_blocks = sys.getallocatedblocks()
+        self._last_allocations = self._pool_allocations()
+        gc.callbacks.append(self._on_gc)
+
+    def _pool_allocations(self):
+        return sum(pool.allocations for pool in self.pools)
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        elif self._gc_start is not None:
+            pause = time.perf_counter() - self._gc_start
+            self.collections += 1
+            self.pause += pause
+            self.max_pause = max(self.max_pause, pause)
+            self._gc_start = None
+
+    def frame(self):
+        blocks = sys.getallocatedblocks()
+        self.blocks += abs(blocks - self._last_blocks)
+        self._last_blocks = blocks
+        self.frames += 1
+        if self.frames == self.report_every:
+            self.report()
+
+    def report(self):
+        allocations = self._pool_allocations()
+        n = max(self.frames, 1)
+        print(f"{self.blocks / n:7.1f} blocks/frame churn, {(allocations - self._last_allocations) / n:5.2f} "
+              f"pool allocations/frame, {self.collections} GCs ({self.pause * 1000:.2f} ms total, "
+              f"{self.max_pause * 1000:.2f} ms max)")
+        self._last_allocations = allocations
+        self.frames = self.blocks = self.collections = 0
+        self.pause = self.max_pause = 0.0
+
+    def close(self):
+        gc.callbacks.remove(self._on_gc)
+
+
+# Benchmark: bullet churn with list copies + list.remove vs a pool with swap-remove
+class _Bullet:
+    __slots__ = ("x", "y", "speed")
+    created = 0
+
+    def __init__(self, x=0, y=0):
+        _Bullet.created += 1
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        self.x = x
+        self.y = y
+        self.speed = 7
+
+
+class _DictBullet:
+    created = 0
+
+    def __init__(self, x, y):
+        _DictBullet.created += 1
+        self.x = x
+        self.y = y
+        self.speed = 7
+
+
+def _lists(frames, spawn, rng):
+    bullets = []
+    for _ in range(frames):
+        for _ in range(spawn):
+            bullets.append(_DictBullet(rng.uniform(0, 800), rng.uniform(300, 600)))
+        for bullet in bullets[:]:
+            bullet.y -= bullet.speed
+            if bullet.y < 0:
+                bullets.remove(bullet)
+    return _DictBullet.created
+
+
+def _pool(frames, spawn, rng):
+    bullets = Pool(_Bullet)
+    for _ in range(frames):
+        for _ in range(spawn):
+            bullets.spawn(rng.uniform(0, 800), rng.uniform(300, 600))
+        items = bullets.items
+        for i in range(bullets.count - 1, -1, -1):
+            bullet = items[i]
+            bullet.y -= bullet.speed
+            if bullet.y < 0:
+                bullets.kill_at(i)
+    return bullets.allocations
+
+
+def benchmark(frames=2000, spawn=20):
+    for name, run in (("list copy + list.remove", _lists), ("pool + swap-remove", _pool)):
+        stats = FrameStats(report_every=0)
+        gc.collect()
+        start = time.perf_counter()
+        created = run(frames, spawn, random.Random(0))
+        frame_ms = (time.perf_counter() - start) / frames * 1000
+        stats.close()
+        print(f"{name:24s} {frame_ms:6.3f} ms/frame  {created / frames:6.2f} objects/frame  "
+              f"{stats.collections} GCs ({stats.pause * 1000:.2f} ms, {stats.max_pause * 1000:.3f} ms max)")
+
+
+if __name__ == "__main__":
+    benchmark()
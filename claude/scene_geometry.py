@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# Bump when the generators below change, so stale cache files are not reused
+GEOMETRY_VERSION = 1
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".scene_cache")
+
+
+# Default harmonics: (frequency, amplitude) terms of the torus radius, sin() terms in
+# theta and cos() terms in z. These give viz1's original surface.
+THETA_HARMONICS = ((5, 0.3),)
+Z_HARMONICS = ((3, 0.2),)
+
+
+def spiral_torus(resolution=100, theta_harmonics=THETA_HARMONICS, z_harmonics=Z_HARMONICS):
+    # The viz1 torus: r = 1 + sum(a * sin(k * theta)) + sum(a * cos(k * z)), colored by
+    # 0.5 * sum(sin(k * theta)) + 0.5 * sum(cos(k * z)) + r. Every term depends on theta
+    # only or z only, so it is computed as one row or one column and broadcast.
+    # colors is already divided by its maximum, ready for a colormap.
+    theta = np.linspace(0, 2 * np.pi, resolution)
+    z = np.linspace(-2, 2, resolution)
+    # Sums start from arrays, so an empty list of harmonics still broadcasts
+    petal = sum((np.sin(k * theta) for k, _ in theta_harmonics), np.zeros(resolution))
+    ripple = sum((np.cos(k * z) for k, _ in z_harmonics), np.zeros(resolution))[:, None]
+    r = (1 + sum((a * np.sin(k * theta) for k, a in theta_harmonics), np.zeros(resolution))
+         + sum((a * np.cos(k * z) for k, a in z_harmonics), np.zeros(resolution))[:, None])
+    x = r * np.sin(theta)
+    y = r * np.cos(theta)
+    colors = 0.5 * petal + 0.5 * ripple + r
+    colors /= np.max(colors)
+    return x, y, np.broadcast_to(z[:, None], r.shape).copy(), colors
+
+
+def spiral_torus_loop(resolution=100, petals=5, ripples=3, petal_depth=0.3, ripple_depth=0.2):
+    # The original per-cell coloring (one harmonic each way), kept as the benchmark baseline
+    theta = np.linspace(0, 2 * np.pi, resolution)
+    z = np.linspace(-2, 2, resolution)
+    theta, z = np.meshgrid(theta, z)
+    r = 1 + petal_depth * np.sin(petals * theta) + ripple_depth * np.cos(ripples * z)
+    x = r * np.sin(theta)
+    y = r * np.cos(theta)
+    colors = np.zeros(z.shape)
+    for i in range(z.shape[0]):
+        for j in range(z.shape[1]):
+            colors[i, j] = 0.5 * np.sin(petals * theta[i, j]) + 0.5 * np.cos(ripples * z[i, j]) + r[i, j]
+    return x, y, z, colors / np.max(colors)
+
+
+def sphere(radius=0.5, resolution=(20, 10)):
+    u, v = np.mgrid[0:2 * np.pi:complex(resolution[0]), 0:np.pi:complex(resolution[1])]
+    return radius * np.cos(u) * np.sin(v), radius * np.sin(u) * np.sin(v), radius * np.cos(v)
+
+
+def vector_field(count=8, extent=2):
+    # Grid points and directions of the quiver field
+    x, y, z = np.mgrid[-extent:extent:complex(count), -extent:extent:complex(count),
+                       -extent:extent:complex(count)]
+    return x, y, z, np.sin(y) * np.cos(z), np.sin(x) * np.cos(z), np.sin(x) * np.cos(y)
+
+
+def build_scene(resolution=100, theta_harmonics=THETA_HARMONICS, z_harmonics=Z_HARMONICS,
+                sphere_resolution=(20, 10), field_count=8):
+    scene = {}
+    for prefix, arrays in (("torus", spiral_torus(resolution, theta_harmonics, z_harmonics)),
+                           ("sphere", sphere(resolution=sphere_resolution)),
+                           ("field", vector_field(field_count))):
+        for name, array in zip("xyzuvw" if prefix == "field" else ("x", "y", "z", "colors"), arrays):
+            scene[f"{prefix}_{name}"] = array
+    return scene
+
+
+def cache_path(params, cache_dir=CACHE_DIR):
+    key = json.dumps(dict(params, version=GEOMETRY_VERSION), sort_keys=True)
+    return os.path.join(cache_dir, f"scene-{hashlib.sha1(key.encode()).hexdigest()[:16]}.npz")
+
+
+def load_scene(resolution=100, theta_harmonics=THETA_HARMONICS, z_harmonics=Z_HARMONICS,
+               sphere_resolution=(20, 10), field_count=8, cache_dir=None):
+    # build_scene, memoized on disk by its parameters when a cache_dir is given (CACHE_DIR,
+    # say). Off by default: building is a few broadcast operations and is no slower than
+    # reading the arrays back, and cache files (about 128 MB at 2000x2000) are never evicted.
+    params = {"resolution": resolution, "theta_harmonics": [list(h) for h in theta_harmonics],
+              "z_harmonics": [list(h) for h in z_harmonics],
+              "sphere_resolution": list(sphere_resolution), "field_count": field_count}
+    if cache_dir is None:
+        return build_scene(**params)
+    path = cache_path(params, cache_dir)
+    if os.path.exists(path):
+        with np.load(path) as data:
+            return dict(data)
+    scene = build_scene(**params)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Uncompressed, so loading is a straight read; written aside and renamed into place
+    # so an interrupted run never leaves a truncated cache file
+    partial = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(partial, **scene)
+    os.replace(partial, path)
+    return scene
+
+
+def benchmark(resolutions=(100, 250, 500, 1000, 2000), loop_limit=500):
+    with tempfile.TemporaryDirectory(prefix="scene_cache_") as cache_dir:
+        _benchmark(resolutions, loop_limit, cache_dir)
+
+
+def _benchmark(resolutions, loop_limit, cache_dir):
+    print(f"{'grid':>10s} {'per-cell loop':>14s} {'vectorized':>11s} {'cache build':>12s} {'cache load':>11s}")
+    for n in resolutions:
+        if n <= loop_limit:
+            start = time.perf_counter()
+            expected = spiral_torus_loop(n)
+            loop = f"{(time.perf_counter() - start) * 1000:11.1f} ms"
+        else:
+            expected, loop = None, f"{'skipped':>14s}"
+        start = time.perf_counter()
+        torus = spiral_torus(n)
+        vectorized = (time.perf_counter() - start) * 1000
+        if expected is not None:
+            assert all(np.allclose(a, b, rtol=0, atol=1e-12) for a, b in zip(torus, expected))
+        start = time.perf_counter()
+        load_scene(n, cache_dir=cache_dir)
+        build = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        load_scene(n, cache_dir=cache_dir)
+        load = (time.perf_counter() - start) * 1000
+        print(f"{n:>4d}x{n:<5d} {loop} {vectorized:8.1f} ms {build:9.1f} ms {load:8.1f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
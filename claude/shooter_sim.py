@@ -0,0 +1,671 @@
+import argparse
+import random
+import statistics
+import time
+
+from entity_arrays import BulletArray, EnemyArray
+from pools import Pool
+from spatial_grid import SpatialGrid
+
+TICKS_PER_SECOND = 60
+INF = float("inf")
+# Below this many bullet/enemy pairs, testing every pair beats building the grid
+GRID_MIN_PAIRS = 256
+# Bullet radius + enemy half-width: the centre distance at which a bullet hits an enemy
+BULLET_REACH = 5 + 25
+POWER_UP_KINDS = ("health", "speed", "weapon")
+
+
+# Game rules and balance knobs; the defaults are the original Space Shooter
+class SimConfig:
+    def __init__(self, width=800, height=600, enemy_spawn_interval=180, power_up_interval=600,
+                 first_shot=(30, 120), shot_interval=(60, 180), level_score=1000, initial_enemies=5,
+                 enemy_health=30, bullet_damage=10, enemy_bullet_damage=10, drop_chance=0.2,
+                 shoot_cooldown=15):
+        self.width = width
+        self.height = height
+        self.enemy_spawn_interval = enemy_spawn_interval
+        self.power_up_interval = power_up_interval
+        self.first_shot = first_shot
+        self.shot_interval = shot_interval
+        self.level_score = level_score
+        self.initial_enemies = initial_enemies
+        self.enemy_health = enemy_health
+        self.bullet_damage = bullet_damage
+        self.enemy_bullet_damage = enemy_bullet_damage
+        self.drop_chance = drop_chance
+        self.shoot_cooldown = shoot_cooldown
+
+    def replace(self, **changes):
+        config = SimConfig(**vars(self))
+        for name, value in changes.items():
+            if not hasattr(config, name):
+                raise AttributeError(name)
+            setattr(config, name, value)
+        return config
+
+
+# Player
+class Player:
+    def __init__(self, config):
+        self.width = 64
+        self.height = 64
+        self.x = config.width // 2 - self.width // 2
+        self.y = config.height - self.height - 20
+        self.speed = 5
+        self.shoot_cooldown = 0
+        self.health = 100
+
+    def move(self, dx, dy, config):
+        x = self.x + dx * self.speed
+        y = self.y + dy * self.speed
+
+        # Boundary check (comparisons rather than min/max: this runs every tick)
+        right = config.width - self.width
+        bottom = config.height - self.height
+        self.x = 0 if x < 0 else right if x > right else x
+        self.y = 0 if y < 0 else bottom if y > bottom else y
+
+    def shoot(self, world):
+        if self.shoot_cooldown == 0:
+            world.bullets.spawn(self.x + self.width // 2, self.y)
+            self.shoot_cooldown = world.config.shoot_cooldown
+
+    def update(self):
+        if self.shoot_cooldown > 0:
+            self.shoot_cooldown -= 1
+
+
+# Enemy
+class Enemy:
+    __slots__ = ("width", "height", "x", "y", "speed_x", "speed_y", "health", "shoot_timer")
+
+    def __init__(self, rng, config):
+        self.width = 50
+        self.height = 50
+        self.x = rng.randint(0, config.width - self.width)
+        self.y = rng.randint(50, 200)
+        self.speed_x = rng.choice([-1, 1]) * rng.uniform(0.5, 2)
+        self.speed_y = rng.uniform(0.2, 0.5)
+        self.health = config.enemy_health
+        self.shoot_timer = rng.randint(*config.first_shot)
+
+    def update(self, rng, config, enemy_bullets):
+        # Move, then shoot; one call per enemy per tick
+        x = self.x = self.x + self.speed_x
+        y = self.y = self.y + self.speed_y
+
+        # Boundary check for left and right
+        if x <= 0 or x >= config.width - self.width:
+            self.speed_x *= -1
+
+        # If enemy reaches bottom, reset position
+        if y > config.height:
+            self.reset(rng, config)
+
+        if self.shoot_timer <= 0:
+            enemy_bullets.spawn(self.x + self.width // 2, self.y + self.height)
+            self.shoot_timer = rng.randint(*config.shot_interval)
+        else:
+            self.shoot_timer -= 1
+
+    def reset(self, rng, config):
+        self.x = rng.randint(0, config.width - self.width)
+        self.y = rng.randint(-100, -50)
+        self.speed_x = rng.choice([-1, 1]) * rng.uniform(0.5, 2)
+        self.speed_y = rng.uniform(0.2, 0.5)
+
+
+# Bullet
+class Bullet:
+    __slots__ = ("x", "y", "radius", "speed")
+
+    def __init__(self, x=0, y=0):
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        self.x = x
+        self.y = y
+        self.radius = 5
+        self.speed = 7
+
+    def move(self):
+        self.y -= self.speed
+
+    def is_off_screen(self):
+        return self.y < 0
+
+    def collides_with(self, enemy):
+        # Compare squared distances to avoid the sqrt
+        dx = self.x - enemy.x - enemy.width // 2
+        dy = self.y - enemy.y - enemy.height // 2
+        reach = self.radius + enemy.width // 2
+        return dx * dx + dy * dy < reach * reach
+
+
+# Enemy Bullet
+class EnemyBullet:
+    __slots__ = ("x", "y", "radius", "speed")
+
+    def __init__(self, x=0, y=0):
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        self.x = x
+        self.y = y
+        self.radius = 4
+        self.speed = 5
+
+    def move(self):
+        self.y += self.speed
+
+    def is_off_screen(self, height):
+        return self.y > height
+
+    def collides_with(self, player):
+        # Check if bullet collides with player's ship
+        return (player.x < self.x < player.x + player.width and
+                player.y < self.y < player.y + player.height)
+
+
+# Explosion
+class Explosion:
+    __slots__ = ("x", "y", "radius", "growth_rate", "fade_speed", "alpha")
+
+    def __init__(self, x=0, y=0):
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        self.x = x
+        self.y = y
+        self.radius = 5
+        self.growth_rate = 2
+        self.fade_speed = 10
+        self.alpha = 255
+
+    def update(self):
+        self.radius += self.growth_rate
+        self.alpha -= self.fade_speed
+        return self.alpha <= 0
+
+
+# Power-up
+class PowerUp:
+    __slots__ = ("width", "height", "x", "y", "speed", "type")
+
+    def __init__(self, x=0, kind="health"):
+        self.reset(x, kind)
+
+    def reset(self, x, kind):
+        self.width = 25
+        self.height = 25
+        self.x = x
+        self.y = -self.height
+        self.speed = 2
+        self.type = kind
+
+    def move(self):
+        self.y += self.speed
+
+    def is_off_screen(self, height):
+        return self.y > height
+
+    def collides_with(self, player):
+        return (self.x < player.x + player.width and self.x + self.width > player.x and
+                self.y < player.y + player.height and self.y + self.height > player.y)
+
+
+def enemy_band(enemies, reach):
+    # Per enemy (top, bottom, cx, cy, enemy): its centre and the rows a bullet within reach
+    # of it can be on; plus the lowest top and highest bottom over all of them
+    rows = []
+    low, high = INF, -INF
+    for enemy in enemies:
+        cy = enemy.y + enemy.height // 2
+        top, bottom = cy - reach, cy + reach
+        rows.append((top, bottom, enemy.x + enemy.width // 2, cy, enemy))
+        if top < low:
+            low = top
+        if bottom > high:
+            high = bottom
+    return rows, low, high
+
+
+class World:
+    # Complete game state plus a fixed-timestep update. step() advances one tick (1/60 s)
+    # given the player's (dx, dy, shoot) controls; there is no pygame dependency.
+    # With vectorized, bullets and enemies live in NumPy arrays (see entity_arrays.py).
+    # Set profiler to a frame_profiler.FrameProfiler to time the phases of each step.
+    def __init__(self, seed=None, config=None, vectorized=False):
+        self.config = config or SimConfig()
+        self.rng = random.Random(seed)
+        self.vectorized = vectorized
+        config = self.config
+        if vectorized:
+            self.enemies = EnemyArray(config.width, config.height, rng=self.rng, health=config.enemy_health,
+                                      first_shot=config.first_shot, shot_interval=config.shot_interval)
+            self.bullets = BulletArray(-7, 5)
+            self.enemy_bullets = BulletArray(5, 4)
+        else:
+            self.enemies = []
+            self.bullets = Pool(Bullet)
+            self.enemy_bullets = Pool(EnemyBullet)
+        self.explosions = Pool(Explosion)
+        self.power_ups = Pool(PowerUp, capacity=8)
+        self.enemy_grid = SpatialGrid()
+        self.profiler = None
+        self.reset()
+
+    def reset(self):
+        self.player = Player(self.config)
+        self.enemies.clear()
+        self.enemy_band = None
+        self.bullets.clear()
+        self.enemy_bullets.clear()
+        self.explosions.clear()
+        self.power_ups.clear()
+        for _ in range(self.config.initial_enemies):
+            self.spawn_enemy()
+        self.enemy_spawn_timer = 0
+        self.power_up_spawn_timer = 0
+        self.score = 0
+        self.level = 1
+        self.tick = 0
+        self.kills = 0
+        self.damage_taken = 0
+        self.game_over = False
+
+    def spawn_enemy(self):
+        if self.vectorized:
+            self.enemies.spawn()
+        else:
+            self.enemies.append(Enemy(self.rng, self.config))
+            self.enemy_band = None
+
+    def spawn_power_up(self, x=None, y=None):
+        # A random x is drawn even for drops at a given spot, keeping the random stream
+        # the same as the original game
+        rng = self.rng
+        random_x = rng.randint(0, self.config.width - 25)
+        power_up = self.power_ups.spawn(random_x if x is None else x, rng.choice(POWER_UP_KINDS))
+        if y is not None:
+            power_up.y = y
+        return power_up
+
+    def enemy_centers(self):
+        enemies = self.enemies
+        if self.vectorized:
+            return list(zip((enemies.x + enemies.width // 2).tolist(), (enemies.y + enemies.height // 2).tolist()))
+        return [(e.x + e.width // 2, e.y + e.height // 2) for e in enemies]
+
+    def enemy_bullet_positions(self):
+        bullets = self.enemy_bullets
+        if self.vectorized:
+            return list(zip(bullets.x.tolist(), bullets.y.tolist()))
+        return [(b.x, b.y) for b in bullets]
+
+    def kill_enemy(self, x, y):
+        self.score += 100
+        self.kills += 1
+        self.explosions.spawn(x + 25, y + 25)
+        if self.rng.random() < self.config.drop_chance:  # chance to drop power-up
+            self.spawn_power_up(x, y)
+
+    def hit_player(self, x, y):
+        damage = self.config.enemy_bullet_damage
+        self.player.health -= damage
+        self.damage_taken += damage
+        self.explosions.spawn(x, y)
+        if self.player.health <= 0:
+            self.game_over = True
+
+    def step(self, controls=(0, 0, False)):
+        if self.game_over:
+            return
+        config = self.config
+        player = self.player
+        profile = self.profiler
+        dx, dy, shoot = controls
+        self.tick += 1
+        # Player.shoot, move and update, inlined: step() runs once per tick, and at the
+        # few entities of a real game its fixed costs are most of the tick
+        cooldown = player.shoot_cooldown
+        if shoot and cooldown == 0:
+            self.bullets.spawn(player.x + player.width // 2, player.y)
+            cooldown = config.shoot_cooldown
+        speed = player.speed
+        if dx:
+            x = player.x + dx * speed
+            right = config.width - player.width
+            player.x = 0 if x < 0 else right if x > right else x
+        if dy:
+            y = player.y + dy * speed
+            bottom = config.height - player.height
+            player.y = 0 if y < 0 else bottom if y > bottom else y
+        player.shoot_cooldown = cooldown - 1 if cooldown > 0 else 0
+        if profile:
+            profile.mark("player")
+
+        if self.vectorized:
+            self._step_arrays(profile)
+        else:
+            self._step_objects(profile)
+
+        # Update explosions
+        explosions = self.explosions
+        items = explosions.items
+        for i in range(explosions.count - 1, -1, -1):
+            # Explosion.update, inlined
+            explosion = items[i]
+            explosion.radius += explosion.growth_rate
+            alpha = explosion.alpha = explosion.alpha - explosion.fade_speed
+            if alpha <= 0:
+                explosions.kill_at(i)
+        if profile:
+            profile.mark("explosions")
+
+        # Update power-ups
+        power_ups = self.power_ups
+        items = power_ups.items
+        left, top = player.x, player.y
+        right, bottom = left + player.width, top + player.height
+        for i in range(power_ups.count - 1, -1, -1):
+            # PowerUp.move, is_off_screen and collides_with, inlined
+            power_up = items[i]
+            y = power_up.y = power_up.y + power_up.speed
+            x = power_up.x
+            if y > config.height:
+                power_ups.kill_at(i)
+            elif x < right and x + power_up.width > left and y < bottom and y + power_up.height > top:
+                if power_up.type == "health":
+                    player.health = min(100, player.health + 25)
+                elif power_up.type == "speed":
+                    player.speed += 1
+                else:  # weapon upgrade
+                    # Here you could implement different weapon types
+                    pass
+                power_ups.kill_at(i)
+        if profile:
+            profile.mark("power_ups")
+
+        # Spawn new enemies
+        self.enemy_spawn_timer += 1
+        if self.enemy_spawn_timer >= config.enemy_spawn_interval and len(self.enemies) < 5 + self.level:
+            self.spawn_enemy()
+            self.enemy_spawn_timer = 0
+
+        # Spawn power-ups
+        self.power_up_spawn_timer += 1
+        if self.power_up_spawn_timer >= config.power_up_interval:
+            self.spawn_power_up()
+            self.power_up_spawn_timer = 0
+
+        # Level progression
+        if self.score >= self.level * config.level_score:
+            self.level += 1
+        if profile:
+            profile.mark("spawning")
+
+    def _step_objects(self, profile=None):
+        config = self.config
+        bullets, enemies, damage = self.bullets, self.enemies, config.bullet_damage
+
+        # Update bullets
+        # Enemy rows, and the band they span: bullets outside it cannot hit anything, and
+        # most of a bullet's flight is spent below the enemies. The enemy pass of the
+        # previous tick leaves them in enemy_band; spawns and resets clear it.
+        band = self.enemy_band
+        if band is None or len(band[0]) != len(enemies):
+            band = enemy_band(enemies, BULLET_REACH)
+        rows, low, high = band
+        reach_squared = BULLET_REACH * BULLET_REACH
+        # Killed enemies are skipped and dropped after the loop. Pools are walked backwards
+        # so swap-remove only moves already-visited objects.
+        grid = self.enemy_grid
+        use_grid = bullets.count * len(enemies) >= GRID_MIN_PAIRS
+        if use_grid:
+            grid.build(range(len(rows)), lambda index: rows[index][2:4])
+        killed = False
+        items = bullets.items
+        for i in range(bullets.count - 1, -1, -1):
+            # Bullet.move and is_off_screen, inlined: this is the hottest loop of a tick
+            bullet = items[i]
+            by = bullet.y = bullet.y - bullet.speed
+            if by < 0:
+                bullets.kill_at(i)
+                continue
+            if not low < by < high:
+                continue
+            bx = bullet.x
+            hit = False
+            nearby = rows
+            if use_grid:
+                nearby = [rows[index] for index in sorted(grid.query_radius(bx, by, BULLET_REACH))]
+            for top, bottom, cx, cy, enemy in nearby:
+                # Bullet.collides_with, inlined: the row test first, since most enemies in
+                # the band are still rows away
+                if top < by < bottom:
+                    dx = bx - cx
+                    dy = by - cy
+                    if dx * dx + dy * dy < reach_squared and enemy.health > 0:
+                        enemy.health -= damage
+                        self.explosions.spawn(bx, by)
+                        if enemy.health <= 0:
+                            killed = True
+                            self.kill_enemy(enemy.x, enemy.y)
+                        hit = True
+            if hit:
+                bullets.kill_at(i)
+        if killed:
+            self.enemies = enemies = [enemy for enemy in enemies if enemy.health > 0]
+        # Moving and hitting are one pass here, so collisions are timed with bullets
+        if profile:
+            profile.mark("bullets")
+
+        # Update enemy bullets
+        enemy_bullets, player = self.enemy_bullets, self.player
+        items = enemy_bullets.items
+        height = config.height
+        left, top = player.x, player.y
+        right, bottom = left + player.width, top + player.height
+        for i in range(enemy_bullets.count - 1, -1, -1):
+            # EnemyBullet.move, is_off_screen and collides_with, inlined (the player does
+            # not move during this loop)
+            enemy_bullet = items[i]
+            y = enemy_bullet.y = enemy_bullet.y + enemy_bullet.speed
+            if y > height:
+                enemy_bullets.kill_at(i)
+            elif top < y < bottom and left < enemy_bullet.x < right:
+                self.hit_player(enemy_bullet.x, y)
+                enemy_bullets.kill_at(i)
+        if profile:
+            profile.mark("enemy_bullets")
+
+        # Update enemies: Enemy.update, inlined, also collecting next tick's enemy_band
+        rng = self.rng
+        width = config.width
+        rows = []
+        low, high = INF, -INF
+        for enemy in enemies:
+            x = enemy.x = enemy.x + enemy.speed_x
+            y = enemy.y = enemy.y + enemy.speed_y
+            if x <= 0 or x >= width - enemy.width:
+                enemy.speed_x *= -1
+            if y > height:
+                enemy.reset(rng, config)
+                x, y = enemy.x, enemy.y
+            if enemy.shoot_timer <= 0:
+                enemy_bullets.spawn(x + enemy.width // 2, y + enemy.height)
+                enemy.shoot_timer = rng.randint(*config.shot_interval)
+            else:
+                enemy.shoot_timer -= 1
+            cy = y + enemy.height // 2
+            top, bottom = cy - BULLET_REACH, cy + BULLET_REACH
+            rows.append((top, bottom, x + enemy.width // 2, cy, enemy))
+            if top < low:
+                low = top
+            if bottom > high:
+                high = bottom
+        self.enemy_band = rows, low, high
+        if profile:
+            profile.mark("enemies")
+
+    def _step_arrays(self, profile=None):
+        # Same rules as _step_objects, one array operation per step
+        bullets, enemies = self.bullets, self.enemies
+        bullets.move()
+        bullets.compact(bullets.y >= 0)
+        if profile:
+            profile.mark("bullets")
+        hit_bullets, hit_enemies, lethal, keep = enemies.take_hits(bullets, self.config.bullet_damage)
+        for bx, by, ex, ey, kill in zip(bullets.x[hit_bullets].tolist(), bullets.y[hit_bullets].tolist(),
+                                        enemies.x[hit_enemies].tolist(), enemies.y[hit_enemies].tolist(),
+                                        lethal.tolist()):
+            self.explosions.spawn(bx, by)
+            if kill:
+                self.kill_enemy(ex, ey)
+        bullets.compact(keep)
+        enemies.compact(enemies.health > 0)
+        if profile:
+            profile.mark("collisions")
+
+        enemy_bullets, player = self.enemy_bullets, self.player
+        enemy_bullets.move()
+        enemy_bullets.compact(enemy_bullets.y <= self.config.height)
+        hit = enemy_bullets.hits_rect(player.x, player.y, player.width, player.height)
+        for bx, by in zip(enemy_bullets.x[hit].tolist(), enemy_bullets.y[hit].tolist()):
+            self.hit_player(bx, by)
+        enemy_bullets.compact(~hit)
+        if profile:
+            profile.mark("enemy_bullets")
+
+        enemies.move_and_shoot(enemy_bullets)
+        if profile:
+            profile.mark("enemies")
+
+
+# Bots: callables mapping a World to this tick's (dx, dy, shoot)
+def idle_bot(world):
+    return 0, 0, False
+
+
+def turret_bot(world):
+    return 0, 0, True
+
+
+class DodgerBot:
+    # Heads for the nearest enemy but never onto a course that an enemy bullet will cross,
+    # and fires whenever ready. Like a person it re-decides only every `reaction` ticks.
+    def __init__(self, reaction=6):
+        self.reaction = reaction
+        self.dx = 0
+
+    def __call__(self, world):
+        if world.tick % self.reaction == 0:
+            self.dx = self.decide(world)
+        return self.dx, 0, True
+
+    def decide(self, world):
+        player = world.player
+        centre = player.x + player.width / 2
+        tx, distance = centre, INF
+        for x, _ in world.enemy_centers():
+            if abs(x - centre) < distance:
+                tx, distance = x, abs(x - centre)
+        # Moves ordered by preference: towards the target first
+        if abs(tx - centre) < player.speed:
+            moves = (0, -1, 1)
+        else:
+            toward = 1 if tx > centre else -1
+            moves = (toward, 0, -toward)
+        # Only bullets reaching the ship's rows within 40 ticks matter; their entry and
+        # exit ticks are the same whichever way the ship moves
+        top, bottom = player.y, player.y + player.height
+        threats = []
+        for bx, by in world.enemy_bullet_positions():
+            leave = (bottom - by) / 5
+            if leave >= 0:
+                enter = (top - by) / 5
+                if enter <= 40:
+                    threats.append((bx, enter, leave))
+        if not threats:
+            return moves[0]
+        # For each move, would any of those bullets pass through the ship while it keeps
+        # moving dx? The ship sweeps from x0 to x1 while a bullet is in its rows.
+        x, ship = player.x, player.width
+        right = world.config.width - ship
+        for dx in moves:
+            step = dx * player.speed
+            for bx, enter, leave in threats:
+                x0 = x + step * enter if enter > 0 else x
+                x1 = x + step * leave
+                x0 = 0 if x0 < 0 else right if x0 > right else x0
+                x1 = 0 if x1 < 0 else right if x1 > right else x1
+                if x0 > x1:
+                    x0, x1 = x1, x0
+                if x0 - 4 < bx < x1 + ship + 4:
+                    break
+            else:
+                return dx
+        return moves[0]
+
+
+class ScriptedBot:
+    # Plays back a fixed list of controls, one per tick, then idles
+    def __init__(self, controls):
+        self.controls = controls
+
+    def __call__(self, world):
+        tick = world.tick
+        return self.controls[tick] if tick < len(self.controls) else (0, 0, False)
+
+
+# Factories, so stateful bots start fresh every episode
+BOTS = {"idle": lambda: idle_bot, "turret": lambda: turret_bot, "dodger": DodgerBot}
+
+
+def run_episode(seed, bot=None, config=None, max_ticks=TICKS_PER_SECOND * 600):
+    # Always the object world: at a game's few entities the array world (vectorized, meant
+    # for viz2's stress mode) is many times slower
+    world = World(seed, config)
+    bot = bot or DodgerBot()
+    while not world.game_over and world.tick < max_ticks:
+        world.step(bot(world))
+    return {"seed": seed, "score": world.score, "ticks": world.tick, "level": world.level,
+            "kills": world.kills, "damage_taken": world.damage_taken, "died": world.game_over}
+
+
+def summarize(results):
+    scores = [r["score"] for r in results]
+    seconds = [r["ticks"] / TICKS_PER_SECOND for r in results]
+    deaths = sum(r["died"] for r in results)
+    print(f"{len(results)} episodes, {deaths} deaths")
+    print(f"  score:     mean {statistics.mean(scores):9.1f}  median {statistics.median(scores):9.1f}  "
+          f"min {min(scores)}  max {max(scores)}")
+    print(f"  survival:  mean {statistics.mean(seconds):8.1f}s  median {statistics.median(seconds):8.1f}s  "
+          f"min {min(seconds):.1f}s  max {max(seconds):.1f}s")
+    print(f"  level:     mean {statistics.mean(r['level'] for r in results):.2f}   "
+          f"damage taken: mean {statistics.mean(r['damage_taken'] for r in results):.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Space Shooter simulation with bot players")
+    parser.add_argument("--seeds", type=int, default=20, help="number of episodes, one per seed")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--bot", choices=sorted(BOTS), default="dodger")
+    parser.add_argument("--max-ticks", type=int, default=TICKS_PER_SECOND * 600,
+                        help="stop an episode after this many ticks (default 10 minutes)")
+    args = parser.parse_args()
+
+    results = []
+    start = time.perf_counter()
+    for seed in range(args.first_seed, args.first_seed + args.seeds):
+        results.append(run_episode(seed, BOTS[args.bot](), max_ticks=args.max_ticks))
+    elapsed = time.perf_counter() - start
+    ticks = sum(r["ticks"] for r in results)
+    summarize(results)
+    print(f"{ticks} ticks in {elapsed:.2f}s ({ticks / elapsed:,.0f} ticks/sec)")
+
+
+if __name__ == "__main__":
+    main()
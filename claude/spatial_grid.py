@@ -0,0 +1,100 @@
+import math
+import random
+import time
+
+
+# Uniform-grid spatial hash: items are bucketed by the cell containing a point
+class SpatialGrid:
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.used = []
+
+    def clear(self):
+        # Empty the buckets but keep them, so rebuilding every frame does not reallocate
+        for bucket in self.used:
+            bucket.clear()
+        self.used.clear()
+
+    def insert(self, item, x, y):
+        key = (int(x // self.cell_size), int(y // self.cell_size))
+        bucket = self.cells.get(key)
+        if bucket is None:
+            bucket = self.cells[key] = []
+        if not bucket:
+            self.used.append(bucket)
+        bucket.append(item)
+
+    def build(self, items, position):
+        # Rebuild from scratch; position(item) -> (x, y)
+        self.clear()
+        for item in items:
+            self.insert(item, *position(item))
+
+    def query(self, left, top, right, bottom):
+        # Items whose points may lie inside the rectangle (cell-level test only)
+        size = self.cell_size
+        cells = self.cells
+        found = []
+        for cx in range(int(left // size), int(right // size) + 1):
+            for cy in range(int(top // size), int(bottom // size) + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.extend(bucket)
+        return found
+
+    def query_radius(self, x, y, radius):
+        return self.query(x - radius, y - radius, x + radius, y + radius)
+
+
+# Benchmark: collision phase of the Space Shooter with stand-in entities
+class _Bullet:
+    def __init__(self, x, y):
+        self.x, self.y, self.radius = x, y, 5
+
+
+class _Enemy:
+    def __init__(self, x, y):
+        self.x, self.y, self.width, self.height = x, y, 50, 50
+
+
+def _naive(bullets, enemies):
+    hits = 0
+    for bullet in bullets:
+        for enemy in enemies:
+            distance = math.sqrt((bullet.x - enemy.x - enemy.width // 2) ** 2 +
+                                 (bullet.y - enemy.y - enemy.height // 2) ** 2)
+            if distance < bullet.radius + enemy.width // 2:
+                hits += 1
+    return hits
+
+
+def _grid(bullets, enemies, grid):
+    grid.build(enemies, lambda e: (e.x + e.width // 2, e.y + e.height // 2))
+    hits = 0
+    for bullet in bullets:
+        for enemy in grid.query_radius(bullet.x, bullet.y, bullet.radius + 25):
+            dx = bullet.x - enemy.x - enemy.width // 2
+            dy = bullet.y - enemy.y - enemy.height // 2
+            reach = bullet.radius + enemy.width // 2
+            if dx * dx + dy * dy < reach * reach:
+                hits += 1
+    return hits
+
+
+def benchmark(num_bullets=2000, num_enemies=500, frames=20):
+    rng = random.Random(0)
+    bullets = [_Bullet(rng.uniform(0, 800), rng.uniform(0, 600)) for _ in range(num_bullets)]
+    enemies = [_Enemy(rng.uniform(0, 750), rng.uniform(0, 550)) for _ in range(num_enemies)]
+    grid = SpatialGrid()
+    for name, check in (("nested loop + sqrt", lambda: _naive(bullets, enemies)),
+                        ("spatial grid + squared distance", lambda: _grid(bullets, enemies, grid))):
+        start = time.perf_counter()
+        for _ in range(frames):
+            hits = check()
+        frame_ms = (time.perf_counter() - start) / frames * 1000
+        print(f"{name:32s} {frame_ms:8.2f} ms/frame  ({hits} hits)")
+
+
+if __name__ == "__main__":
+    benchmark()
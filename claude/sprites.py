@@ -0,0 +1,258 @@
+import functools
+import os
+import random
+import time
+
+import pygame
+
+PLAYER_SIZE = (64, 64)
+ENEMY_SIZE = (50, 50)
+POWER_UP_SIZE = (25, 25)
+POWER_UP_COLORS = {"health": (0, 255, 0), "speed": (0, 255, 255), "weapon": (255, 255, 0)}
+EXPLOSION_COLOR = (255, 200, 0)
+
+
+# Glyphs: the drawing code for each entity, at (x, y) on any surface
+def player_glyph(surface, x, y, width=64, height=64, color=(0, 255, 0)):
+    # Draw ship body
+    rect = pygame.draw.polygon(surface, color, [
+        (x + width // 2, y),  # Top
+        (x, y + height),  # Bottom left
+        (x + width, y + height)  # Bottom right
+    ])
+
+    # Draw cockpit
+    return rect.union(pygame.draw.circle(surface, (100, 100, 255), (x + width // 2, y + height // 2), 10))
+
+
+def enemy_glyph(surface, x, y, width=50, height=50, color=(255, 0, 0)):
+    # Draw enemy ship
+    rect = pygame.draw.polygon(surface, color, [
+        (x + width // 2, y + height),  # Bottom
+        (x, y),  # Top left
+        (x + width, y)  # Top right
+    ])
+
+    # Draw alien eyes
+    eye_radius = 5
+    eye_distance = 15
+    return rect.unionall([
+        pygame.draw.circle(surface, (255, 255, 255),
+                           (int(x + width // 2 - eye_distance), int(y + 20)), eye_radius),
+        pygame.draw.circle(surface, (255, 255, 255),
+                           (int(x + width // 2 + eye_distance), int(y + 20)), eye_radius)
+    ])
+
+
+def bullet_glyph(surface, x, y, radius=5, color=(0, 255, 255)):
+    rect = pygame.draw.circle(surface, color, (int(x), int(y)), radius)
+    # Add glow effect
+    return rect.union(pygame.draw.circle(surface, (100, 200, 255), (int(x), int(y)), radius + 2, 1))
+
+
+def enemy_bullet_glyph(surface, x, y, radius=4, color=(255, 100, 0)):
+    return pygame.draw.circle(surface, color, (int(x), int(y)), radius)
+
+
+def power_up_glyph(surface, x, y, kind, width=25, height=25):
+    # The icon lies inside the box, so the box is the whole glyph
+    rect = pygame.draw.rect(surface, POWER_UP_COLORS[kind], (x, y, width, height))
+    # Draw an icon based on power-up type
+    if kind == "health":
+        # Draw plus sign
+        pygame.draw.line(surface, (255, 255, 255),
+                         (x + width // 2, y + 5), (x + width // 2, y + height - 5), 3)
+        pygame.draw.line(surface, (255, 255, 255),
+                         (x + 5, y + height // 2), (x + width - 5, y + height // 2), 3)
+    elif kind == "speed":
+        # Draw arrow
+        pygame.draw.polygon(surface, (255, 255, 255), [
+            (x + width // 2, y + 5),
+            (x + 5, y + height - 5),
+            (x + width - 5, y + height - 5)
+        ])
+    else:
+        # Draw star
+        pygame.draw.circle(surface, (255, 255, 255), (x + width // 2, y + height // 2), 5)
+    return rect
+
+
+def explosion_surface(radius, alpha, color=EXPLOSION_COLOR):
+    # Create a surface for the explosion with transparency
+    surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+    pygame.draw.circle(surface, (*color, alpha), (radius, radius), radius)
+    return surface
+
+
+class DirectDraw:
+    # Rasterizes every glyph on every call. Like SpriteCache, each method returns the
+    # rect it touched.
+    def player(self, surface, x, y):
+        return player_glyph(surface, x, y)
+
+    def enemy(self, surface, x, y):
+        return enemy_glyph(surface, x, y)
+
+    def bullet(self, surface, x, y):
+        return bullet_glyph(surface, x, y)
+
+    def enemy_bullet(self, surface, x, y):
+        return enemy_bullet_glyph(surface, x, y)
+
+    def power_up(self, surface, x, y, kind):
+        return power_up_glyph(surface, x, y, kind)
+
+    def explosion(self, surface, x, y, radius, alpha):
+        return surface.blit(explosion_surface(radius, alpha), (x - radius, y - radius))
+
+
+def prerender(size, draw, offset=(0, 0)):
+    # Draw a glyph once into a display-format surface; black is the transparent colorkey
+    sprite = pygame.Surface(size).convert()
+    draw(sprite, *offset)
+    sprite.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+    return sprite
+
+
+class SpriteCache:
+    # Glyphs pre-rendered once (needs a display mode set, for convert()); explosion frames
+    # are built on demand and kept in a small LRU keyed by (radius, alpha).
+    def __init__(self, explosion_frames=64):
+        self.player_sprite = prerender((PLAYER_SIZE[0] + 1, PLAYER_SIZE[1] + 1), player_glyph)
+        self.enemy_sprite = prerender((ENEMY_SIZE[0] + 1, ENEMY_SIZE[1] + 1), enemy_glyph)
+        self.bullet_sprite = prerender((15, 15), bullet_glyph, (7, 7))
+        self.enemy_bullet_sprite = prerender((9, 9), enemy_bullet_glyph, (4, 4))
+        self.power_up_sprites = {kind: prerender(POWER_UP_SIZE, functools.partial(power_up_glyph, kind=kind))
+                                 for kind in POWER_UP_COLORS}
+        self.explosion_frame = functools.lru_cache(maxsize=explosion_frames)(self._explosion_frame)
+
+    @staticmethod
+    def _explosion_frame(radius, alpha):
+        return explosion_surface(radius, alpha).convert_alpha()
+
+    def player(self, surface, x, y):
+        return surface.blit(self.player_sprite, (int(x), int(y)))
+
+    def enemy(self, surface, x, y):
+        return surface.blit(self.enemy_sprite, (int(x), int(y)))
+
+    def bullet(self, surface, x, y):
+        return surface.blit(self.bullet_sprite, (int(x) - 7, int(y) - 7))
+
+    def enemy_bullet(self, surface, x, y):
+        return surface.blit(self.enemy_bullet_sprite, (int(x) - 4, int(y) - 4))
+
+    def power_up(self, surface, x, y, kind):
+        return surface.blit(self.power_up_sprites[kind], (x, y))
+
+    def explosion(self, surface, x, y, radius, alpha):
+        return surface.blit(self.explosion_frame(radius, alpha), (x - radius, y - radius))
+
+
+class DirtyRects:
+    # Dirty-rectangle presenter. begin() erases what was drawn last frame by copying those
+    # rects back from the background; present() updates only last frame's and this
+    # frame's rects on the display. With full_redraw, or when a frame has more than
+    # max_rects rects, the whole screen is redrawn and updated instead.
+    def __init__(self, screen, background, full_redraw=False, max_rects=400):
+        self.screen = screen
+        self.background = background
+        self.full_redraw = full_redraw
+        self.max_rects = max_rects
+        self.previous = None
+        self.current = []
+
+    def begin(self):
+        if self.full_redraw or self.previous is None:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            background = self.background
+            self.screen.blits([(background, rect, rect) for rect in self.previous], doreturn=False)
+
+    def add(self, rect):
+        self.current.append(rect)
+
+    def extend(self, rects):
+        self.current.extend(rects)
+
+    def present(self):
+        previous, current = self.previous, self.current
+        if self.full_redraw:
+            pygame.display.update()
+            current.clear()
+            return
+        if previous is None or len(previous) + len(current) > self.max_rects:
+            pygame.display.update()
+        else:
+            pygame.display.update(previous + current)
+        # This frame's rects get erased at the next begin(); past max_rects one full
+        # background blit is cheaper than that many small ones
+        self.previous = current if len(current) <= self.max_rects else None
+        self.current = previous or []
+        self.current.clear()
+
+
+class TextCache:
+    # Keeps the last rendered surface per HUD slot and only re-renders when its text changes
+    def __init__(self, font, enabled=True):
+        self.font = font
+        self.enabled = enabled
+        self.slots = {}
+        self.renders = 0
+
+    def render(self, slot, text, color=(255, 255, 255)):
+        cached = self.slots.get(slot)
+        if self.enabled and cached is not None and cached[0] == text:
+            return cached[1]
+        self.renders += 1
+        surface = self.font.render(text, True, color)
+        self.slots[slot] = (text, surface)
+        return surface
+
+
+# Benchmark: a busy frame drawn with DirectDraw vs SpriteCache
+def _scene(rng, enemies=12, bullets=60, enemy_bullets=40, power_ups=6, explosions=20):
+    return {
+        "enemy": [(rng.uniform(0, 750), rng.uniform(0, 300)) for _ in range(enemies)],
+        "bullet": [(rng.uniform(0, 800), rng.uniform(0, 600)) for _ in range(bullets)],
+        "enemy_bullet": [(rng.uniform(0, 800), rng.uniform(0, 600)) for _ in range(enemy_bullets)],
+        "power_up": [(rng.randint(0, 775), rng.randint(0, 575), rng.choice(list(POWER_UP_COLORS)))
+                     for _ in range(power_ups)],
+        # Explosions grow 2px and fade 10 alpha per frame from radius 5, alpha 255
+        "explosion": [(rng.uniform(0, 800), rng.uniform(0, 600), 5 + 2 * age, 255 - 10 * age)
+                      for age in (rng.randrange(25) for _ in range(explosions))],
+    }
+
+
+def _draw(screen, art, hud, scene, frame):
+    art.player(screen, 368, 516)
+    for name in ("enemy", "bullet", "enemy_bullet", "power_up", "explosion"):
+        draw = getattr(art, name)
+        for args in scene[name]:
+            draw(screen, *args)
+    screen.blit(hud.render("health", "Health: 100"), (10, 10))
+    screen.blit(hud.render("score", f"Score: {frame // 60 * 100}"), (600, 10))
+    screen.blit(hud.render("level", "Level: 1"), (600, 50))
+
+
+def benchmark(frames=600):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    font = pygame.font.SysFont(None, 36)
+    scene = _scene(random.Random(0))
+    background = pygame.Surface((800, 600)).convert()
+    background.fill((0, 0, 30))
+    for name, art, hud in (("direct draw + font.render", DirectDraw(), TextCache(font, enabled=False)),
+                           ("sprite cache + text cache", SpriteCache(), TextCache(font))):
+        start = time.perf_counter()
+        for frame in range(frames):
+            screen.blit(background, (0, 0))
+            _draw(screen, art, hud, scene, frame)
+        frame_ms = (time.perf_counter() - start) / frames * 1000
+        print(f"{name:26s} {frame_ms:6.3f} ms/frame  ({hud.renders / frames:.2f} text renders/frame)")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    benchmark()
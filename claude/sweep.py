@@ -0,0 +1,225 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from shooter_sim import BOTS, TICKS_PER_SECOND, SimConfig, run_episode
+
+# Columns of one episode in the checkpoint file
+FIELDS = ("seed", "score", "ticks", "damage_taken", "died")
+
+
+def config_grid(spawn_intervals, power_up_intervals, shot_intervals, level_scores):
+    base = SimConfig()
+    configs = []
+    for spawn, power_up, shots, level in itertools.product(spawn_intervals, power_up_intervals,
+                                                           shot_intervals, level_scores):
+        name = f"spawn={spawn} powerup={power_up} shots={shots[0]}-{shots[1]} level={level}"
+        configs.append((name, base.replace(enemy_spawn_interval=spawn, power_up_interval=power_up,
+                                           shot_interval=shots, level_score=level)))
+    return configs
+
+
+def run_chunk(index, config, seeds, bot, max_ticks):
+    # Runs in a worker. Episodes are capped at max_ticks, so a chunk's cost is bounded
+    # by len(seeds) * max_ticks however well the bot plays.
+    rows = []
+    for seed in seeds:
+        result = run_episode(seed, BOTS[bot](), config, max_ticks)
+        rows.append([result[field] for field in FIELDS])
+    return index, seeds[0], rows
+
+
+# Checkpoint: JSON lines, a header with the sweep parameters then one line per finished
+# chunk. Lines are appended and flushed as chunks finish, so an interrupted sweep loses
+# at most the chunks that were still running.
+def sweep_header(configs, seeds, bot, max_ticks, chunk):
+    return {"configs": [name for name, _ in configs], "seeds": [seeds[0], len(seeds)], "bot": bot,
+            "max_ticks": max_ticks, "chunk": chunk}
+
+
+def default_checkpoint(header):
+    # Named after the sweep parameters, so a sweep over a different grid starts its own
+    # file instead of tripping over another sweep's
+    digest = hashlib.sha1(json.dumps(header, sort_keys=True).encode()).hexdigest()[:12]
+    return f"sweep.{digest}.checkpoint.jsonl"
+
+
+def trim_checkpoint(path):
+    # Cut a torn last line (from an interrupted write) off the checkpoint, so the chunks
+    # appended on resume start on a line of their own
+    if not os.path.exists(path):
+        return
+    with open(path, "r+b") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+
+
+def load_checkpoint(path, header):
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        lines = f.read().splitlines()
+    if not lines:
+        return done
+    if json.loads(lines[0]) != header:
+        raise SystemExit(f"{path} was written by a sweep with different parameters; "
+                         f"remove it or pass another --checkpoint")
+    for line in lines[1:]:
+        try:
+            chunk = json.loads(line)
+        except ValueError:
+            continue  # Torn line from an interrupted write
+        done[chunk["config"], chunk["first_seed"]] = chunk["rows"]
+    return done
+
+
+def run_sweep(configs, seeds, bot="dodger", max_ticks=TICKS_PER_SECOND * 300, chunk=25, workers=None,
+              checkpoint=None, progress=True):
+    # Every configuration plays the same seeds, so differences between rows of the
+    # table come from the configuration rather than from luck of the draw.
+    header = sweep_header(configs, seeds, bot, max_ticks, chunk)
+    if checkpoint:
+        trim_checkpoint(checkpoint)
+    done = load_checkpoint(checkpoint, header) if checkpoint else {}
+    todo = [(i, seeds[start:start + chunk]) for i in range(len(configs))
+            for start in range(0, len(seeds), chunk) if (i, seeds[start]) not in done]
+    total = len(done) + len(todo)
+    log = None
+    if checkpoint:
+        log = open(checkpoint, "a")
+        if log.tell() == 0:
+            log.write(json.dumps(header) + "\n")
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Keep only a few chunks per worker in flight so finished work is
+            # checkpointed steadily instead of all at the end
+            limit = 4 * (workers or os.cpu_count() or 1)
+            pending = set()
+            queue = iter(todo)
+            while True:
+                for i, chunk_seeds in itertools.islice(queue, limit - len(pending)):
+                    pending.add(pool.submit(run_chunk, i, configs[i][1], chunk_seeds, bot, max_ticks))
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i, first_seed, rows = future.result()
+                    done[i, first_seed] = rows
+                    if log:
+                        log.write(json.dumps({"config": i, "first_seed": first_seed, "rows": rows}) + "\n")
+                        log.flush()
+                if progress:
+                    print(f"\r{len(done)}/{total} chunks", end="", file=sys.stderr, flush=True)
+    finally:
+        if log:
+            log.close()
+    if progress:
+        print(file=sys.stderr)
+    results = [[] for _ in configs]
+    for (i, _), rows in sorted(done.items()):
+        results[i].extend(dict(zip(FIELDS, row)) for row in rows)
+    return results
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def summary_row(results):
+    seconds = [r["ticks"] / TICKS_PER_SECOND for r in results]
+    scores = [r["score"] for r in results]
+    damage = [r["damage_taken"] for r in results]
+    return {
+        "games": len(results),
+        "death_rate": sum(r["died"] for r in results) / len(results),
+        "survival_p10": percentile(seconds, 0.1),
+        "survival_median": statistics.median(seconds),
+        "survival_p90": percentile(seconds, 0.9),
+        "score_mean": statistics.mean(scores),
+        "score_median": statistics.median(scores),
+        "score_p90": percentile(scores, 0.9),
+        "damage_mean": statistics.mean(damage),
+        "damage_p90": percentile(damage, 0.9),
+    }
+
+
+def print_table(configs, results):
+    print(f"{'configuration':44s} {'games':>6s} {'deaths':>7s} {'survival s p10/med/p90':>23s} "
+          f"{'score mean/med/p90':>22s} {'damage mean/p90':>16s}")
+    for (name, _), rows in zip(configs, results):
+        s = summary_row(rows)
+        print(f"{name:44s} {s['games']:6d} {s['death_rate']:7.1%} "
+              f"{s['survival_p10']:7.0f}/{s['survival_median']:6.0f}/{s['survival_p90']:6.0f}   "
+              f"{s['score_mean']:7.0f}/{s['score_median']:6.0f}/{s['score_p90']:6.0f}   "
+              f"{s['damage_mean']:7.1f}/{s['damage_p90']:5.0f}")
+
+
+def write_json(path, configs, results):
+    table = [dict(name=name, **summary_row(rows)) for (name, _), rows in zip(configs, results)]
+    with open(path, "w") as f:
+        json.dump(table, f, indent=2)
+
+
+def parse_ints(text):
+    return [int(v) for v in text.split(",")]
+
+
+def parse_ranges(text):
+    # "30-90,60-180" -> [(30, 90), (60, 180)]
+    return [tuple(int(v) for v in part.split("-")) for part in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Space Shooter difficulty sweep: seeded bot games per "
+                                                 "configuration across all cores")
+    parser.add_argument("--spawn-interval", type=parse_ints, default=[120, 180, 240],
+                        help="ticks between enemy spawns")
+    parser.add_argument("--power-up-interval", type=parse_ints, default=[600])
+    parser.add_argument("--shot-interval", type=parse_ranges, default=[(60, 180)],
+                        help="enemy reload ranges in ticks, e.g. 40-120,60-180")
+    parser.add_argument("--level-score", type=parse_ints, default=[1000])
+    parser.add_argument("--seeds", type=int, default=1000, help="games per configuration")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--bot", choices=sorted(BOTS), default="dodger")
+    parser.add_argument("--max-ticks", type=int, default=TICKS_PER_SECOND * 300,
+                        help="end a game after this many ticks (default 5 minutes)")
+    parser.add_argument("--chunk", type=int, default=25, help="games per work unit")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--checkpoint", default=None,
+                        help="finished chunks are appended here and skipped when the sweep is rerun "
+                             "(default: sweep.<hash of the sweep parameters>.checkpoint.jsonl)")
+    parser.add_argument("--no-checkpoint", action="store_true", help="do not write or read a checkpoint")
+    parser.add_argument("--out", default=None, help="also write the results table as JSON")
+    args = parser.parse_args()
+    if args.seeds < 1:
+        parser.error("--seeds must be at least 1")
+    if args.chunk < 1:
+        parser.error("--chunk must be at least 1")
+
+    configs = config_grid(args.spawn_interval, args.power_up_interval, args.shot_interval, args.level_score)
+    seeds = list(range(args.first_seed, args.first_seed + args.seeds))
+    checkpoint = None
+    if not args.no_checkpoint:
+        checkpoint = args.checkpoint or default_checkpoint(
+            sweep_header(configs, seeds, args.bot, args.max_ticks, args.chunk))
+    start = time.perf_counter()
+    results = run_sweep(configs, seeds, args.bot, args.max_ticks, args.chunk, args.workers, checkpoint)
+    elapsed = time.perf_counter() - start
+    print_table(configs, results)
+    if args.out:
+        write_json(args.out, configs, results)
+    print(f"{len(configs)} configs x {len(seeds)} games in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
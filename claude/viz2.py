@@ -1,7 +1,30 @@
+import argparse
 import pygame
 import random
-import math
+from itertools import repeat
 from pygame import mixer
+import time
+from frame_profiler import FrameProfiler, ProfilerOverlay
+from pools import FrameStats, Pool
+from shooter_sim import TICKS_PER_SECOND, World
+from sprites import DirectDraw, DirtyRects, SpriteCache, TextCache
+
+parser = argparse.ArgumentParser(description="Space Shooter")
+parser.add_argument("--stats", action="store_true", help="print per-frame allocation and GC-pause figures")
+parser.add_argument("--vectorized", action="store_true",
+                    help="keep bullets and enemies in NumPy arrays and update them with array operations")
+parser.add_argument("--no-sprite-cache", action="store_true",
+                    help="rasterize every entity and HUD string each frame instead of using cached sprites")
+parser.add_argument("--full-redraw", action="store_true",
+                    help="redraw and update the whole screen every frame instead of only dirty rects")
+parser.add_argument("--stress", type=int, default=0, metavar="N",
+                    help="with --vectorized, top the player bullets up to N in total every tick "
+                         "(the player's own shots count towards N)")
+parser.add_argument("--seed", type=int, default=None, help="seed for the game's random events")
+parser.add_argument("--profile", action="store_true",
+                    help="time each phase of the frame, draw a frame-time graph and print percentiles on exit")
+parser.add_argument("--trace", metavar="PATH", help="with --profile, write a Chrome trace JSON file on exit")
+args = parser.parse_args()
 
 # Initialize pygame
 pygame.init()
@@ -12,7 +35,7 @@ screen_height = 600
 screen = pygame.display.set_mode((screen_width, screen_height))
 
 # Background
-background = pygame.Surface((screen_width, screen_height))
+background = pygame.Surface((screen_width, screen_height)).convert()
 background.fill((0, 0, 30))  # Dark blue background
 
 # Create stars for the background
@@ -26,430 +49,189 @@ for i in range(100):
 # Title and Icon
 pygame.display.set_caption("Space Shooter")
 
-# Player
-class Player:
-    def __init__(self):
-        self.width = 64
-        self.height = 64
-        self.x = screen_width // 2 - self.width // 2
-        self.y = screen_height - self.height - 20
-        self.speed = 5
-        self.color = (0, 255, 0)  # Green
-        self.shoot_cooldown = 0
-        self.health = 100
-        self.score = 0
-
-    def draw(self):
-        # Draw ship body
-        pygame.draw.polygon(screen, self.color, [
-            (self.x + self.width // 2, self.y),  # Top
-            (self.x, self.y + self.height),  # Bottom left
-            (self.x + self.width, self.y + self.height)  # Bottom right
-        ])
-        
-        # Draw cockpit
-        pygame.draw.circle(screen, (100, 100, 255), 
-                          (self.x + self.width // 2, self.y + self.height // 2), 10)
-
-    def move(self, dx, dy):
-        self.x += dx * self.speed
-        self.y += dy * self.speed
-        
-        # Boundary check
-        self.x = max(0, min(self.x, screen_width - self.width))
-        self.y = max(0, min(self.y, screen_height - self.height))
-
-    def shoot(self):
-        if self.shoot_cooldown == 0:
-            bullets.append(Bullet(self.x + self.width // 2, self.y))
-            self.shoot_cooldown = 15
-        
-    def update(self):
-        if self.shoot_cooldown > 0:
-            self.shoot_cooldown -= 1
-
-# Enemy
-class Enemy:
-    def __init__(self):
-        self.width = 50
-        self.height = 50
-        self.x = random.randint(0, screen_width - self.width)
-        self.y = random.randint(50, 200)
-        self.speed_x = random.choice([-1, 1]) * random.uniform(0.5, 2)
-        self.speed_y = random.uniform(0.2, 0.5)
-        self.color = (255, 0, 0)  # Red
-        self.health = 30
-        self.shoot_timer = random.randint(30, 120)
-    
-    def draw(self):
-        # Draw enemy ship
-        pygame.draw.polygon(screen, self.color, [
-            (self.x + self.width // 2, self.y + self.height),  # Bottom
-            (self.x, self.y),  # Top left
-            (self.x + self.width, self.y)  # Top right
-        ])
-        
-        # Draw alien eyes
-        eye_radius = 5
-        eye_distance = 15
-        pygame.draw.circle(screen, (255, 255, 255), 
-                          (int(self.x + self.width // 2 - eye_distance), int(self.y + 20)), eye_radius)
-        pygame.draw.circle(screen, (255, 255, 255), 
-                          (int(self.x + self.width // 2 + eye_distance), int(self.y + 20)), eye_radius)
-    
-    def move(self):
-        self.x += self.speed_x
-        self.y += self.speed_y
-        
-        # Boundary check for left and right
-        if self.x <= 0 or self.x >= screen_width - self.width:
-            self.speed_x *= -1
-        
-        # If enemy reaches bottom, reset position
-        if self.y > screen_height:
-            self.reset()
-    
-    def shoot(self):
-        if self.shoot_timer <= 0:
-            enemy_bullets.append(EnemyBullet(self.x + self.width // 2, self.y + self.height))
-            self.shoot_timer = random.randint(60, 180)
-        else:
-            self.shoot_timer -= 1
-    
-    def reset(self):
-        self.x = random.randint(0, screen_width - self.width)
-        self.y = random.randint(-100, -50)
-        self.speed_x = random.choice([-1, 1]) * random.uniform(0.5, 2)
-        self.speed_y = random.uniform(0.2, 0.5)
-
-# Bullet
-class Bullet:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.radius = 5
-        self.speed = 7
-        self.color = (0, 255, 255)  # Cyan
-    
-    def draw(self):
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
-        # Add glow effect
-        pygame.draw.circle(screen, (100, 200, 255), (int(self.x), int(self.y)), self.radius + 2, 1)
-    
-    def move(self):
-        self.y -= self.speed
-    
-    def is_off_screen(self):
-        return self.y < 0
-    
-    def collides_with(self, enemy):
-        distance = math.sqrt((self.x - enemy.x - enemy.width // 2) ** 2 + 
-                            (self.y - enemy.y - enemy.height // 2) ** 2)
-        return distance < self.radius + enemy.width // 2
-
-# Enemy Bullet
-class EnemyBullet:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.radius = 4
-        self.speed = 5
-        self.color = (255, 100, 0)  # Orange
-    
-    def draw(self):
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
-    
-    def move(self):
-        self.y += self.speed
-    
-    def is_off_screen(self):
-        return self.y > screen_height
-    
-    def collides_with(self, player):
-        # Check if bullet collides with player's ship
-        if (self.x > player.x and self.x < player.x + player.width and
-            self.y > player.y and self.y < player.y + player.height):
-            return True
-        return False
-
-# Explosion
-class Explosion:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.radius = 5
-        self.max_radius = 30
-        self.growth_rate = 2
-        self.fade_speed = 10
-        self.color = (255, 200, 0)  # Yellow-orange
-        self.alpha = 255
-    
-    def draw(self):
-        # Create a surface for the explosion with transparency
-        explosion_surface = pygame.Surface((self.radius * 2, self.radius * 2), pygame.SRCALPHA)
-        pygame.draw.circle(explosion_surface, (*self.color, self.alpha), 
-                          (self.radius, self.radius), self.radius)
-        screen.blit(explosion_surface, (self.x - self.radius, self.y - self.radius))
-    
-    def update(self):
-        self.radius += self.growth_rate
-        self.alpha -= self.fade_speed
-        return self.alpha <= 0
-
-# Power-up
-class PowerUp:
-    def __init__(self):
-        self.width = 25
-        self.height = 25
-        self.x = random.randint(0, screen_width - self.width)
-        self.y = -self.height
-        self.speed = 2
-        self.type = random.choice(["health", "speed", "weapon"])
-        if self.type == "health":
-            self.color = (0, 255, 0)  # Green
-        elif self.type == "speed":
-            self.color = (0, 255, 255)  # Cyan
-        else:
-            self.color = (255, 255, 0)  # Yellow
-    
-    def draw(self):
-        pygame.draw.rect(screen, self.color, (self.x, self.y, self.width, self.height))
-        # Draw an icon based on power-up type
-        if self.type == "health":
-            # Draw plus sign
-            pygame.draw.line(screen, (255, 255, 255), 
-                            (self.x + self.width // 2, self.y + 5), 
-                            (self.x + self.width // 2, self.y + self.height - 5), 3)
-            pygame.draw.line(screen, (255, 255, 255), 
-                            (self.x + 5, self.y + self.height // 2), 
-                            (self.x + self.width - 5, self.y + self.height // 2), 3)
-        elif self.type == "speed":
-            # Draw arrow
-            pygame.draw.polygon(screen, (255, 255, 255), [
-                (self.x + self.width // 2, self.y + 5),
-                (self.x + 5, self.y + self.height - 5),
-                (self.x + self.width - 5, self.y + self.height - 5)
-            ])
-        else:
-            # Draw star
-            pygame.draw.circle(screen, (255, 255, 255), 
-                              (self.x + self.width // 2, self.y + self.height // 2), 5)
-    
-    def move(self):
-        self.y += self.speed
-    
-    def is_off_screen(self):
-        return self.y > screen_height
-    
-    def collides_with(self, player):
-        if (self.x < player.x + player.width and self.x + self.width > player.x and
-            self.y < player.y + player.height and self.y + self.height > player.y):
-            return True
-        return False
-
-# Create player
-player = Player()
-
-# Lists to store entities
-enemies = []
-bullets = []
-enemy_bullets = []
-explosions = []
-power_ups = []
-
-# Create initial enemies
-for _ in range(5):
-    enemies.append(Enemy())
-
-# Game variables
-game_over = False
-enemy_spawn_timer = 0
-power_up_spawn_timer = 0
-score = 0
-level = 1
+# Entity art: pre-rendered sprites, or the original per-frame rasterizing
+sprite_cache = SpriteCache()
+art = DirectDraw() if args.no_sprite_cache else sprite_cache
+
+# The game itself: rules, entities and the fixed-timestep update live in shooter_sim.
+# This script only reads the keyboard and draws the world.
+world = World(args.seed, vectorized=args.vectorized)
+
+# Array bullets are always drawn with one blits() call of a cached sprite
+def draw_bullets(array, sprite):
+    offset = sprite.get_width() // 2
+    xs = (array.x.astype(int) - offset).tolist()
+    ys = (array.y.astype(int) - offset).tolist()
+    return screen.blits(zip(repeat(sprite), zip(xs, ys)))
+
+def read_movement():
+    keys = pygame.key.get_pressed()
+    dx, dy = 0, 0
+    if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+        dx = -1
+    if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        dx = 1
+    if keys[pygame.K_UP] or keys[pygame.K_w]:
+        dy = -1
+    if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+        dy = 1
+    return dx, dy
+
+# HUD
 font = pygame.font.SysFont(None, 36)
+game_over_font = pygame.font.SysFont(None, 72)
+hud = TextCache(font, enabled=not args.no_sprite_cache)
+big_hud = TextCache(game_over_font, enabled=not args.no_sprite_cache)
+
+# Run with --stats to print per-frame allocation and GC-pause figures
+if args.stats:
+    stats = FrameStats([pool for pool in (world.bullets, world.enemy_bullets, world.explosions, world.power_ups)
+                        if isinstance(pool, Pool)])
+else:
+    stats = None
+
+# Run with --profile to time each phase of the frame; profiler stays None otherwise
+if args.profile:
+    profiler = FrameProfiler(trace=bool(args.trace))
+    overlay = ProfilerOverlay(profiler, pygame.font.SysFont(None, 20))
+    world.profiler = profiler
+else:
+    profiler = None
+
+# Only the rects drawn last frame and this frame are erased and pushed to the display
+dirty = DirtyRects(screen, background, full_redraw=args.full_redraw)
 
 # Game loop
+# The world advances in fixed 1/60 s ticks however long a frame takes; a slow frame runs
+# several ticks to catch up (at most a quarter second's worth).
 running = True
 clock = pygame.time.Clock()
 FPS = 60
+tick_length = 1 / TICKS_PER_SECOND
+lag = 0.0
+last_time = time.perf_counter()
+shoot = False
 
 while running:
-    # Fill the screen with background
-    screen.blit(background, (0, 0))
+    if profiler:
+        profiler.begin_frame()
+    # Restore the background under last frame's entities
+    dirty.begin()
     
     # Event handling
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
         
-        if not game_over:
+        if not world.game_over:
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
-                    player.shoot()
-    
-    if not game_over:
-        # Player controls
-        keys = pygame.key.get_pressed()
-        dx, dy = 0, 0
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            dx = -1
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            dx = 1
-        if keys[pygame.K_UP] or keys[pygame.K_w]:
-            dy = -1
-        if keys[pygame.K_DOWN] or keys[pygame.K_s]:
-            dy = 1
-        player.move(dx, dy)
-        player.update()
-        
-        # Update bullets
-        for bullet in bullets[:]:
-            bullet.move()
-            if bullet.is_off_screen():
-                bullets.remove(bullet)
-            else:
-                for enemy in enemies[:]:
-                    if bullet.collides_with(enemy):
-                        enemy.health -= 10
-                        explosions.append(Explosion(bullet.x, bullet.y))
-                        if enemy.health <= 0:
-                            score += 100
-                            explosions.append(Explosion(enemy.x + enemy.width // 2, enemy.y + enemy.height // 2))
-                            enemies.remove(enemy)
-                            if random.random() < 0.2:  # 20% chance to drop power-up
-                                power_up = PowerUp()
-                                power_up.x = enemy.x
-                                power_up.y = enemy.y
-                                power_ups.append(power_up)
-                        if bullet in bullets:
-                            bullets.remove(bullet)
-        
-        # Update enemy bullets
-        for enemy_bullet in enemy_bullets[:]:
-            enemy_bullet.move()
-            if enemy_bullet.is_off_screen():
-                enemy_bullets.remove(enemy_bullet)
-            elif enemy_bullet.collides_with(player):
-                player.health -= 10
-                explosions.append(Explosion(enemy_bullet.x, enemy_bullet.y))
-                enemy_bullets.remove(enemy_bullet)
-                if player.health <= 0:
-                    game_over = True
-        
-        # Update enemies
-        for enemy in enemies:
-            enemy.move()
-            enemy.shoot()
-        
-        # Update explosions
-        for explosion in explosions[:]:
-            if explosion.update():
-                explosions.remove(explosion)
-        
-        # Update power-ups
-        for power_up in power_ups[:]:
-            power_up.move()
-            if power_up.is_off_screen():
-                power_ups.remove(power_up)
-            elif power_up.collides_with(player):
-                if power_up.type == "health":
-                    player.health = min(100, player.health + 25)
-                elif power_up.type == "speed":
-                    player.speed += 1
-                else:  # weapon upgrade
-                    # Here you could implement different weapon types
-                    pass
-                power_ups.remove(power_up)
-        
-        # Spawn new enemies
-        enemy_spawn_timer += 1
-        if enemy_spawn_timer >= 180 and len(enemies) < 5 + level:  # Spawn every 3 seconds
-            enemies.append(Enemy())
-            enemy_spawn_timer = 0
-        
-        # Spawn power-ups
-        power_up_spawn_timer += 1
-        if power_up_spawn_timer >= 600:  # Spawn every 10 seconds
-            power_ups.append(PowerUp())
-            power_up_spawn_timer = 0
-        
-        # Level progression
-        if score >= level * 1000:
-            level += 1
+                    shoot = True
+    
+    # Update the world
+    now = time.perf_counter()
+    lag += min(now - last_time, 0.25)
+    last_time = now
+    dx, dy = read_movement()
+    if profiler:
+        profiler.mark("events")
+    while lag >= tick_length:
+        if world.vectorized:
+            while len(world.bullets) < args.stress:
+                world.bullets.spawn(random.uniform(0, screen_width), random.uniform(0, screen_height))
+        if profiler:
+            profiler.mark("update")
+        world.step((dx, dy, shoot))
+        shoot = False
+        lag -= tick_length
     
     # Draw everything
+    if profiler:
+        profiler.mark("update")  # Tick bookkeeping around the world's own phases
+    player = world.player
     # Draw player
-    if not game_over:
-        player.draw()
-    
-    # Draw enemies
-    for enemy in enemies:
-        enemy.draw()
-    
-    # Draw bullets
-    for bullet in bullets:
-        bullet.draw()
-    
-    # Draw enemy bullets
-    for enemy_bullet in enemy_bullets:
-        enemy_bullet.draw()
+    if not world.game_over:
+        dirty.add(art.player(screen, player.x, player.y))
+    
+    if world.vectorized:
+        enemies = world.enemies
+        for x, y in zip(enemies.x.tolist(), enemies.y.tolist()):
+            dirty.add(art.enemy(screen, x, y))
+        dirty.extend(draw_bullets(world.bullets, sprite_cache.bullet_sprite))
+        dirty.extend(draw_bullets(world.enemy_bullets, sprite_cache.enemy_bullet_sprite))
+    else:
+        # Draw enemies
+        for enemy in world.enemies:
+            dirty.add(art.enemy(screen, enemy.x, enemy.y))
+        
+        # Draw bullets
+        for bullet in world.bullets:
+            dirty.add(art.bullet(screen, bullet.x, bullet.y))
+        
+        # Draw enemy bullets
+        for enemy_bullet in world.enemy_bullets:
+            dirty.add(art.enemy_bullet(screen, enemy_bullet.x, enemy_bullet.y))
     
     # Draw explosions
-    for explosion in explosions:
-        explosion.draw()
+    for explosion in world.explosions:
+        dirty.add(art.explosion(screen, explosion.x, explosion.y, explosion.radius, explosion.alpha))
     
     # Draw power-ups
-    for power_up in power_ups:
-        power_up.draw()
+    for power_up in world.power_ups:
+        dirty.add(art.power_up(screen, power_up.x, power_up.y, power_up.type))
+    
+    if profiler:
+        profiler.mark("draw")
     
     # Draw HUD (Heads-Up Display)
     # Health bar
-    health_text = font.render(f"Health: {player.health}", True, (255, 255, 255))
-    screen.blit(health_text, (10, 10))
-    pygame.draw.rect(screen, (255, 0, 0), (150, 15, 200, 20))  # Red background
+    health_text = hud.render("health", f"Health: {player.health}")
+    dirty.add(screen.blit(health_text, (10, 10)))
+    dirty.add(pygame.draw.rect(screen, (255, 0, 0), (150, 15, 200, 20)))  # Red background
     pygame.draw.rect(screen, (0, 255, 0), (150, 15, player.health * 2, 20))  # Green health
     
     # Score
-    score_text = font.render(f"Score: {score}", True, (255, 255, 255))
-    screen.blit(score_text, (screen_width - 200, 10))
+    score_text = hud.render("score", f"Score: {world.score}")
+    dirty.add(screen.blit(score_text, (screen_width - 200, 10)))
     
     # Level
-    level_text = font.render(f"Level: {level}", True, (255, 255, 255))
-    screen.blit(level_text, (screen_width - 200, 50))
+    level_text = hud.render("level", f"Level: {world.level}")
+    dirty.add(screen.blit(level_text, (screen_width - 200, 50)))
     
     # Game over message
-    if game_over:
-        game_over_font = pygame.font.SysFont(None, 72)
-        game_over_text = game_over_font.render("GAME OVER", True, (255, 0, 0))
-        screen.blit(game_over_text, (screen_width // 2 - 180, screen_height // 2 - 36))
+    if world.game_over:
+        game_over_text = big_hud.render("game_over", "GAME OVER", (255, 0, 0))
+        dirty.add(screen.blit(game_over_text, (screen_width // 2 - 180, screen_height // 2 - 36)))
         
-        restart_font = pygame.font.SysFont(None, 36)
-        restart_text = restart_font.render("Press R to restart", True, (255, 255, 255))
-        screen.blit(restart_text, (screen_width // 2 - 120, screen_height // 2 + 50))
+        restart_text = hud.render("restart", "Press R to restart")
+        dirty.add(screen.blit(restart_text, (screen_width // 2 - 120, screen_height // 2 + 50)))
         
         keys = pygame.key.get_pressed()
         if keys[pygame.K_r]:
             # Reset game
-            game_over = False
-            player = Player()
-            enemies = []
-            bullets = []
-            enemy_bullets = []
-            explosions = []
-            power_ups = []
-            for _ in range(5):
-                enemies.append(Enemy())
-            enemy_spawn_timer = 0
-            power_up_spawn_timer = 0
-            score = 0
-            level = 1
+            world.reset()
+    if profiler:
+        profiler.mark("hud")
+        dirty.extend(overlay.draw(screen))
+        profiler.mark("profiler")
     
     # Update display
-    pygame.display.update()
+    dirty.present()
+    if profiler:
+        profiler.mark("display")
     
     # Cap the frame rate
     clock.tick(FPS)
+    if stats:
+        stats.frame()
+    if profiler:
+        profiler.mark("wait")
+        profiler.end_frame()
+
+if profiler:
+    print(profiler.report())
+    if args.trace:
+        profiler.write_trace(args.trace)
 
 # Quit pygame
 pygame.quit()
\ No newline at end of file
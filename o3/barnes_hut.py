@@ -0,0 +1,201 @@
+import time
+
+import numpy as np
+
+# Barnes-Hut self-gravity for ParticleSystem, with the tree built and walked in NumPy a
+# whole level at a time rather than per particle. The force law is the one the attractors
+# use, G * m * d / (|d|^2 + epsilon), summed over the other particles; a cell far enough
+# away is replaced by its total mass at its centre of mass.
+
+DEPTH = 20  # Quadtree levels below the root; Morton codes use 2 * DEPTH bits
+
+
+def _spread_bits(v):
+    # Put bit k of each 32-bit value at bit 2k
+    v = v.astype(np.uint64)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                        (2, 0x3333333333333333), (1, 0x5555555555555555)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def morton_codes(positions, depth=DEPTH):
+    # Z-order codes of the positions on a 2 ** depth grid over their bounding square, with the
+    # square's lower corner and side. Sorting by code puts every quadtree cell's particles
+    # in one contiguous run, at every level.
+    lower = positions.min(axis=0)
+    side = float((positions.max(axis=0) - lower).max()) or 1.0
+    side *= 1 + 1e-9  # So the particles on the upper edges land inside the last row and column
+    scale = (1 << depth) / side
+    cells = np.minimum(((positions - lower) * scale).astype(np.int64), (1 << depth) - 1)
+    return _spread_bits(cells[:, 0]) | (_spread_bits(cells[:, 1]) << np.uint64(1)), lower, side
+
+
+class QuadTree:
+    # Linear quadtree over the particles sorted by Morton code. Cells are numbered level by
+    # level from the root (cell 0), and each holds the run start:end of the sorted
+    # particles, its mass and centre of mass, and the run of its children among the next
+    # level's cells. A cell with leaf_size particles or fewer is a leaf and is not split.
+    def __init__(self, positions, masses, leaf_size=8, depth=DEPTH):
+        codes, self.lower, self.side = morton_codes(positions, depth)
+        self.order = np.argsort(codes, kind="stable")
+        codes = codes[self.order]
+        self.positions = positions[self.order]
+        self.masses = masses[self.order]
+        n = len(codes)
+        # Running sums, so a cell's mass and moment are two lookups
+        mass_sum = np.concatenate(([0.0], np.cumsum(self.masses)))
+        moment_sum = np.concatenate((np.zeros((1, 2)), np.cumsum(self.positions * self.masses[:, None], axis=0)))
+
+        starts, ends, sizes, first_child, child_count, leaf = [], [], [], [], [], []
+        active = np.ones(n, bool)  # Particles in cells that are still being split
+        change = np.empty(n, bool)
+        change[0] = True
+        cells = 0
+        for level in range(depth + 1):
+            keys = codes >> np.uint64(2 * (depth - level))
+            np.not_equal(keys[1:], keys[:-1], out=change[1:])
+            bounds = np.flatnonzero(change)
+            keep = active[bounds]
+            level_starts = bounds[keep]
+            level_ends = np.append(bounds[1:], n)[keep]
+            if level:
+                # The children of the previous level's split cells are the runs inside theirs
+                first = np.searchsorted(level_starts, parent_starts)
+                first_child.append(cells + first)
+                child_count.append(np.searchsorted(level_starts, parent_ends) - first)
+            is_leaf = (level_ends - level_starts <= leaf_size) | (level == depth)
+            starts.append(level_starts)
+            ends.append(level_ends)
+            sizes.append(np.full(len(level_starts), self.side / (1 << level)))
+            leaf.append(is_leaf)
+            cells += len(level_starts)
+            parent_starts, parent_ends = level_starts[~is_leaf], level_ends[~is_leaf]
+            if not len(parent_starts):
+                break
+            edges = np.zeros(n + 1, np.int8)
+            edges[parent_starts] += 1
+            edges[parent_ends] -= 1
+            active = np.cumsum(edges[:-1]) > 0
+
+        self.start = np.concatenate(starts)
+        self.end = np.concatenate(ends)
+        self.size = np.concatenate(sizes)
+        self.leaf = np.concatenate(leaf)
+        # Children indexed by cell; zero for leaves
+        self.first_child = np.zeros(cells, np.int64)
+        self.child_count = np.zeros(cells, np.int64)
+        split = np.flatnonzero(~self.leaf)
+        if len(split):
+            self.first_child[split] = np.concatenate(first_child)
+            self.child_count[split] = np.concatenate(child_count)
+        self.mass = mass_sum[self.end] - mass_sum[self.start]
+        self.center = (moment_sum[self.end] - moment_sum[self.start]) / self.mass[:, None]
+        self.levels = len(starts)
+
+    def accelerations(self, G, epsilon, theta=0.5, chunk=4096):
+        # G * sum_j m_j * (x_j - x_i) / (|x_j - x_i|^2 + epsilon) for every particle, in the
+        # tree's sorted order. Each particle starts paired with the root; at every level a
+        # pair whose cell has size < theta * distance to its centre of mass (or is a leaf)
+        # is settled, and the rest are replaced by the pairs with the cell's children.
+        # Particles go through in runs of `chunk`, which bounds the number of pairs.
+        # theta=0 opens every cell down to the leaves, which is the exact sum.
+        positions = self.positions
+        n = len(positions)
+        acc = np.zeros((n, 2))
+        theta2 = theta * theta
+        for first in range(0, n, chunk):
+            particle = np.arange(first, min(first + chunk, n))
+            cell = np.zeros(len(particle), np.int64)
+            block = acc[first:first + chunk]
+            while len(particle):
+                d = self.center[cell] - positions[particle]
+                r2 = np.einsum("ij,ij->i", d, d)
+                far = self.size[cell] ** 2 < theta2 * r2
+                _add(block, particle[far] - first, d[far], r2[far], self.mass[cell[far]], epsilon)
+                near = ~far
+                particle, cell = particle[near], cell[near]
+                leaf = self.leaf[cell]
+                if leaf.any():
+                    # Near leaves are summed particle by particle. A particle's own term has
+                    # d = 0 and contributes nothing.
+                    target, source = _expand(particle[leaf], self.start[cell[leaf]],
+                                             self.end[cell[leaf]] - self.start[cell[leaf]])
+                    d = positions[source] - positions[target]
+                    _add(block, target - first, d, np.einsum("ij,ij->i", d, d), self.masses[source], epsilon)
+                split = ~leaf
+                particle, cell = _expand(particle[split], self.first_child[cell[split]],
+                                         self.child_count[cell[split]])
+        acc *= G
+        return acc
+
+
+def _add(acc, particle, d, r2, mass, epsilon):
+    # acc[particle] += mass * d / (r2 + epsilon), with repeated particles summed
+    if not len(particle):
+        return
+    weight = mass / (r2 + epsilon)
+    n = len(acc)
+    acc[:, 0] += np.bincount(particle, d[:, 0] * weight, minlength=n)
+    acc[:, 1] += np.bincount(particle, d[:, 1] * weight, minlength=n)
+
+
+def _expand(owner, start, count):
+    # Pairs (owner[i], start[i] + k) for k in range(count[i]), for every i
+    total = int(count.sum())
+    offsets = np.cumsum(count) - count
+    owners = np.repeat(owner, count)
+    return owners, np.repeat(start - offsets, count) + np.arange(total)
+
+
+def accelerations(positions, masses, G, epsilon, theta=0.5, leaf_size=8):
+    # Barnes-Hut self-gravity, in the particles' own order
+    positions = np.asarray(positions, np.float64)
+    tree = QuadTree(positions, np.broadcast_to(np.asarray(masses, np.float64), len(positions)), leaf_size)
+    acc = np.empty_like(positions)
+    acc[tree.order] = tree.accelerations(G, epsilon, theta)
+    return acc
+
+
+def brute_force(positions, masses, G, epsilon, targets=None, chunk=1024):
+    # The exact O(N^2) sum, for the particles in targets (default all), in blocks of chunk
+    positions = np.asarray(positions, np.float64)
+    masses = np.broadcast_to(np.asarray(masses, np.float64), len(positions))
+    targets = np.arange(len(positions)) if targets is None else targets
+    acc = np.empty((len(targets), 2))
+    for first in range(0, len(targets), chunk):
+        block = positions[targets[first:first + chunk]]
+        d = positions[None, :, :] - block[:, None, :]
+        weight = masses / (np.einsum("ijk,ijk->ij", d, d) + epsilon)
+        acc[first:first + chunk] = np.einsum("ijk,ij->ik", d, weight)
+    return G * acc
+
+
+def benchmark(counts=(1000, 10000, 100000), thetas=(0.3, 0.5, 0.8, 1.2), G=50, epsilon=0.1, sample=10000):
+    # Time and force error of Barnes-Hut against the exact sum, over ParticleSystem's initial
+    # distribution (uniform over a 20 x 20 square) with total mass 1. The error is
+    # |a_bh - a_exact| / |a_exact| per particle. Above `sample` particles the exact sum is
+    # only computed for `sample` random particles, and its full time is scaled up from those.
+    rng = np.random.RandomState(42)
+    print(f"{'particles':>9s} {'theta':>5s} {'exact':>10s} {'Barnes-Hut':>11s} {'speedup':>8s} "
+          f"{'median err':>11s} {'p99 err':>9s}")
+    for n in counts:
+        positions = rng.uniform(-10, 10, (n, 2))
+        masses = 1.0 / n
+        targets = np.arange(n) if n <= sample else np.sort(rng.choice(n, sample, replace=False))
+        start = time.perf_counter()
+        exact = brute_force(positions, masses, G, epsilon, targets)
+        exact_time = (time.perf_counter() - start) * n / len(targets)
+        scaled = "*" if len(targets) < n else " "
+        for theta in thetas:
+            start = time.perf_counter()
+            approx = accelerations(positions, masses, G, epsilon, theta)[targets]
+            bh_time = time.perf_counter() - start
+            error = np.linalg.norm(approx - exact, axis=1) / np.linalg.norm(exact, axis=1)
+            print(f"{n:9d} {theta:5.1f} {exact_time:8.3f}s{scaled} {bh_time:10.3f}s {exact_time / bh_time:7.1f}x "
+                  f"{np.median(error):11.2e} {np.percentile(error, 99):9.2e}")
+    print(f"* exact time scaled up from {sample} particles")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,167 @@
+import argparse, gc, time, tracemalloc
+
+import numpy as np
+
+from game_3shot import Combatant
+
+FIELDS = (("max_hp", np.int32), ("hp", np.int32), ("attack", np.int32), ("defense", np.int32),
+          ("special_cooldown", np.int16), ("heal_count", np.int16), ("defending", np.bool_),
+          ("dodging", np.bool_), ("charged", np.bool_), ("charge_turns_left", np.int16))
+
+
+class CombatantArray:
+    # Struct-of-arrays store for many Combatants: one contiguous array per attribute.
+    def __init__(self, n, hp, attack, defense, heal_count=0, name="Unit"):
+        self.name = name
+        for field, dtype in FIELDS:
+            setattr(self, field, np.zeros(n, dtype=dtype))
+        self.max_hp[:] = hp
+        self.hp[:] = hp
+        self.attack[:] = attack
+        self.defense[:] = defense
+        self.heal_count[:] = heal_count
+
+    @classmethod
+    def from_template(cls, template, n):
+        units = cls(n, template.max_hp, template.attack, template.defense, template.heal_count, template.name)
+        for field, _ in FIELDS:
+            getattr(units, field)[:] = getattr(template, field)
+        return units
+
+    @classmethod
+    def from_combatants(cls, combatants):
+        units = cls(len(combatants), 0, 0, 0, name=[c.name for c in combatants])
+        for field, _ in FIELDS:
+            getattr(units, field)[:] = [getattr(c, field) for c in combatants]
+        return units
+
+    def __len__(self):
+        return self.hp.size
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return CombatantView(self, index % len(self))
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, field).nbytes for field, _ in FIELDS)
+
+    def compact(self, keep):
+        for field, _ in FIELDS:
+            setattr(self, field, getattr(self, field)[keep])
+        if isinstance(self.name, list):
+            self.name = [n for n, k in zip(self.name, keep) if k]
+
+    def is_alive(self):
+        return self.hp > 0
+
+    def take_damage(self, dmg, index=None):
+        # Repeated indices accumulate, which matches applying the hits one after another.
+        if index is None:
+            self.hp -= np.minimum(dmg, self.hp).astype(self.hp.dtype)
+        else:
+            np.subtract.at(self.hp, index, np.asarray(dmg, dtype=self.hp.dtype))
+            self.hp[index] = np.maximum(self.hp[index], 0)
+        return dmg
+
+    def update_status(self):
+        self.defending[:] = False
+        self.dodging[:] = False
+        self.charge_turns_left -= self.charged
+        self.charged &= self.charge_turns_left > 0
+        self.special_cooldown -= self.special_cooldown > 0
+
+
+class CombatantView:
+    # Single-unit access with the Combatant interface, backed by a CombatantArray row.
+    __slots__ = ("units", "index")
+
+    def __init__(self, units, index):
+        self.units = units
+        self.index = index
+
+    @property
+    def name(self):
+        name = self.units.name
+        return name[self.index] if isinstance(name, list) else name
+
+    def is_alive(self):
+        return self.hp > 0
+
+    def take_damage(self, dmg):
+        self.hp = max(self.hp - dmg, 0)
+        return dmg
+
+    def update_status(self):
+        self.defending = False
+        self.dodging = False
+        if self.charged:
+            self.charge_turns_left -= 1
+            if self.charge_turns_left <= 0:
+                self.charged = False
+        if self.special_cooldown > 0:
+            self.special_cooldown -= 1
+
+
+def _field(field, kind):
+    def get(self):
+        return kind(getattr(self.units, field)[self.index])
+
+    def set(self, value):
+        getattr(self.units, field)[self.index] = value
+
+    return property(get, set)
+
+
+for _name, _dtype in FIELDS:
+    setattr(CombatantView, _name, _field(_name, bool if _dtype is np.bool_ else int))
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def benchmark(n, rounds=5):
+    rng = np.random.default_rng(0)
+    dmg = rng.integers(0, 30, n)
+    dmg_list = dmg.tolist()
+
+    units, soa_bytes = measure(lambda: CombatantArray(n, 100, 20, 6, heal_count=1))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        units.take_damage(dmg)
+        units.update_status()
+        alive = np.count_nonzero(units.is_alive())
+    soa = (time.perf_counter() - start) / rounds
+
+    objs, obj_bytes = measure(lambda: [Combatant("Unit", 100, 20, 6, heal_count=1) for _ in range(n)])
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for c, d in zip(objs, dmg_list):
+            c.take_damage(d)
+            c.update_status()
+        alive_objs = sum(c.is_alive() for c in objs)
+    obj = (time.perf_counter() - start) / rounds
+    assert alive == alive_objs
+
+    print(f"{n:>9,} units  Combatant: {obj_bytes / n:6.1f} B/unit {obj * 1e3:9.2f} ms/round   "
+          f"CombatantArray: {soa_bytes / n:5.1f} B/unit {soa * 1e3:7.2f} ms/round   "
+          f"({obj_bytes / soa_bytes:.0f}x smaller, {obj / soa:.0f}x faster)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and throughput of CombatantArray vs Combatant")
+    parser.add_argument("sizes", type=int, nargs="*", default=[10_000, 1_000_000])
+    args = parser.parse_args()
+    for n in args.sizes:
+        benchmark(n)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-import random, os, time
+import argparse, copy, random, os, struct, time
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -45,50 +45,56 @@ class Combatant:
         if self.special_cooldown > 0:
             self.special_cooldown -= 1
 
+def status_line(player, enemy):
+    return (f"{color_text(player.name, CYAN)}: {player.hp}/{player.max_hp} HP | "
+            f"{color_text(enemy.name, RED)}: {enemy.hp}/{enemy.max_hp} HP")
+
 def display_status(player, enemy):
-    print(f"{color_text(player.name, CYAN)}: {player.hp}/{player.max_hp} HP", end=" | ")
-    print(f"{color_text(enemy.name, RED)}: {enemy.hp}/{enemy.max_hp} HP")
+    print(status_line(player, enemy))
+
+def quiet(*args, **kwargs):
+    pass
 
-def basic_attack(attacker, defender):
-    mult = random.uniform(0.9, 1.1)
+def basic_attack(attacker, defender, rng=random, say=print):
+    mult = rng.uniform(0.9, 1.1)
     bonus = 1.5 if attacker.charged else 1.0
     if attacker.charged:
         attacker.charged = False
         attacker.charge_turns_left = 0
     dmg = int(attacker.attack * mult * bonus) - defender.defense
     dmg = max(dmg, 0)
-    if random.random() < 0.1:
+    if rng.random() < 0.1:
         dmg *= 2
-        print(color_text("Critical hit!", YELLOW))
+        say(color_text("Critical hit!", YELLOW))
     if defender.dodging:
-        if random.random() < 0.5:
-            print(f"{defender.name} dodged the attack!")
+        if rng.random() < 0.5:
+            say(f"{defender.name} dodged the attack!")
             return 0
         else:
-            print(f"{defender.name} failed to dodge!")
+            say(f"{defender.name} failed to dodge!")
     if defender.defending:
         dmg //= 2
     return defender.take_damage(dmg)
 
-def special_attack(attacker, defender):
-    mult = random.uniform(1.5, 2.0)
+def special_attack(attacker, defender, rng=random, say=print):
+    mult = rng.uniform(1.5, 2.0)
     dmg = int(attacker.attack * mult) - int(defender.defense * 0.75)
     dmg = max(dmg, 0)
-    if random.random() < 0.1:
+    if rng.random() < 0.1:
         dmg *= 2
-        print(color_text("Critical hit!", YELLOW))
+        say(color_text("Critical hit!", YELLOW))
     if defender.dodging:
-        if random.random() < 0.4:
-            print(f"{defender.name} dodged the special attack!")
+        if rng.random() < 0.4:
+            say(f"{defender.name} dodged the special attack!")
             return 0
         else:
-            print(f"{defender.name} failed to dodge the special!")
+            say(f"{defender.name} failed to dodge the special!")
     if defender.defending:
         dmg //= 2
     return defender.take_damage(dmg)
 
-def heal_target(target):
-    amount = random.randint(15, 25)
+def heal_target(target, rng=random):
+    amount = rng.randint(15, 25)
     target.hp = min(target.hp + amount, target.max_hp)
     return amount
 
@@ -96,61 +102,64 @@ def charge_target(attacker):
     attacker.charged = True
     attacker.charge_turns_left = 1
 
-def player_turn(player, enemy):
+def player_action(player, enemy, choice, rng=random, say=print):
+    if choice == "1":
+        dmg = basic_attack(player, enemy, rng, say)
+        say(f"You attack and deal {dmg} damage.")
+    elif choice == "2":
+        player.defending = True
+        say("You take a defensive stance.")
+    elif choice == "3":
+        player.dodging = True
+        say("You prepare to dodge the next attack.")
+    elif choice == "4" and player.special_cooldown == 0:
+        dmg = special_attack(player, enemy, rng, say)
+        say("You gather your strength and unleash a powerful blow!")
+        say(f"You deal {dmg} damage with your special attack!")
+        player.special_cooldown = 3
+    elif choice == "5" and player.heal_count > 0:
+        amount = heal_target(player, rng)
+        player.heal_count -= 1
+        say(f"You heal for {amount} HP.")
+    elif choice == "6":
+        if player.charged:
+            say("You're already charged!")
+        else:
+            charge_target(player)
+            say("You focus your energy to charge your next attack!")
+    else:
+        return False
+    return True
+
+def action_menu(player):
+    lines = ["\nChoose an action:", "1. Attack", "2. Defend", "3. Dodge"]
+    if player.special_cooldown == 0:
+        lines.append("4. Special Attack")
+    if player.heal_count > 0:
+        lines.append("5. Heal")
+    lines.append("6. Charge (boost next attack)")
+    return lines
+
+def player_turn(player, enemy, rng=random, log=None):
     while True:
         display_status(player, enemy)
-        print("\nChoose an action:")
-        print("1. Attack")
-        print("2. Defend")
-        print("3. Dodge")
-        if player.special_cooldown == 0:
-            print("4. Special Attack")
-        if player.heal_count > 0:
-            print("5. Heal")
-        print("6. Charge (boost next attack)")
+        print("\n".join(action_menu(player)))
         choice = input("Action: ").strip()
-        if choice == "1":
-            dmg = basic_attack(player, enemy)
-            print(f"You attack and deal {dmg} damage.")
-            break
-        elif choice == "2":
-            player.defending = True
-            print("You take a defensive stance.")
-            break
-        elif choice == "3":
-            player.dodging = True
-            print("You prepare to dodge the next attack.")
+        if player_action(player, enemy, choice, rng):
+            if log:
+                log.append(choice)
             break
-        elif choice == "4" and player.special_cooldown == 0:
-            dmg = special_attack(player, enemy)
-            print("You gather your strength and unleash a powerful blow!")
-            print(f"You deal {dmg} damage with your special attack!")
-            player.special_cooldown = 3
-            break
-        elif choice == "5" and player.heal_count > 0:
-            amount = heal_target(player)
-            player.heal_count -= 1
-            print(f"You heal for {amount} HP.")
-            break
-        elif choice == "6":
-            if player.charged:
-                print("You're already charged!")
-            else:
-                charge_target(player)
-                print("You focus your energy to charge your next attack!")
-            break
-        else:
-            print("Invalid action. Try again.")
+        print("Invalid action. Try again.")
     time.sleep(1)
 
-def enemy_decision(enemy, player):
+def enemy_decision(enemy, player, rng=random):
     if enemy.hp < enemy.max_hp * 0.3 and enemy.heal_count > 0:
         return "heal"
-    if enemy.special_cooldown == 0 and random.random() < 0.3:
+    if enemy.special_cooldown == 0 and rng.random() < 0.3:
         return "special"
     if enemy.charged:
         return "attack"
-    roll = random.random()
+    roll = rng.random()
     if roll < 0.5:
         return "attack"
     elif roll < 0.7:
@@ -160,45 +169,51 @@ def enemy_decision(enemy, player):
     else:
         return "charge"
 
-def enemy_turn(enemy, player):
-    action = enemy_decision(enemy, player)
+def enemy_action(enemy, player, rng=random, say=print):
+    action = enemy_decision(enemy, player, rng)
     if action == "attack":
-        dmg = basic_attack(enemy, player)
-        print(f"{enemy.name} lunges forward and deals {dmg} damage!")
+        dmg = basic_attack(enemy, player, rng, say)
+        say(f"{enemy.name} lunges forward and deals {dmg} damage!")
     elif action == "defend":
         enemy.defending = True
-        print(f"{enemy.name} braces for your attack.")
+        say(f"{enemy.name} braces for your attack.")
     elif action == "dodge":
         enemy.dodging = True
-        print(f"{enemy.name} prepares to dodge your next move.")
+        say(f"{enemy.name} prepares to dodge your next move.")
     elif action == "special":
-        dmg = special_attack(enemy, player)
-        print(f"{enemy.name} unleashes a devastating special attack dealing {dmg} damage!")
+        dmg = special_attack(enemy, player, rng, say)
+        say(f"{enemy.name} unleashes a devastating special attack dealing {dmg} damage!")
         enemy.special_cooldown = 3
     elif action == "heal":
-        amount = heal_target(enemy)
+        amount = heal_target(enemy, rng)
         enemy.heal_count -= 1
-        print(f"{enemy.name} rejuvenates, healing for {amount} HP.")
+        say(f"{enemy.name} rejuvenates, healing for {amount} HP.")
     elif action == "charge":
         if not enemy.charged:
             charge_target(enemy)
-            print(f"{enemy.name} is charging up for a powerful strike!")
+            say(f"{enemy.name} is charging up for a powerful strike!")
         else:
-            dmg = basic_attack(enemy, player)
-            print(f"{enemy.name} attacks and deals {dmg} damage!")
+            dmg = basic_attack(enemy, player, rng, say)
+            say(f"{enemy.name} attacks and deals {dmg} damage!")
+
+def enemy_turn(enemy, player, rng=random):
+    enemy_action(enemy, player, rng)
     time.sleep(1)
 
-def game_loop():
-    player = Combatant("Hero", 120, 25, 8, heal_count=2)
-    enemy = Combatant("Goblin Warlord", 100, 20, 6, heal_count=1)
+def new_fight():
+    return (Combatant("Hero", 120, 25, 8, heal_count=2),
+            Combatant("Goblin Warlord", 100, 20, 6, heal_count=1))
+
+def game_loop(rng=random, log=None):
+    player, enemy = new_fight()
     turn = 1
     while player.is_alive() and enemy.is_alive():
         clear_screen()
         print(color_text(f"--- Turn {turn} ---", YELLOW))
-        player_turn(player, enemy)
+        player_turn(player, enemy, rng, log)
         if not enemy.is_alive():
             break
-        enemy_turn(enemy, player)
+        enemy_turn(enemy, player, rng)
         player.update_status()
         enemy.update_status()
         turn += 1
@@ -208,14 +223,103 @@ def game_loop():
     else:
         print(color_text("Defeat... You have fallen in battle.", RED))
 
+# Action log: an 8-byte magic/version header and the session seed, then one byte per
+# accepted player action. Enemy moves are not stored; they are re-rolled from the seed.
+LOG_MAGIC = b"G3SLOG01"
+LOG_HEADER = struct.Struct("<8sq")
+
+class ActionLog:
+    def __init__(self, path, seed):
+        self.seed = seed
+        self.file = open(path, "wb", buffering=0)
+        self.file.write(LOG_HEADER.pack(LOG_MAGIC, seed))
+
+    def append(self, choice):
+        self.file.write(choice.encode("ascii"))
+
+    def close(self):
+        self.file.close()
+
+def read_log(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, seed = LOG_HEADER.unpack_from(data)
+    if magic != LOG_MAGIC:
+        raise ValueError(f"{path} is not a game_3shot action log")
+    return seed, data[LOG_HEADER.size:].decode("ascii")
+
+class Replay:
+    # Re-runs a logged session silently. Snapshots taken every `stride` actions make
+    # repeated seeks cost at most `stride` turns each.
+    def __init__(self, seed, actions, stride=1024):
+        self.seed = seed
+        self.actions = actions
+        self.stride = stride
+        player, enemy = new_fight()
+        self.snapshots = [(0, 0, 1, player, enemy, random.Random(seed).getstate())]
+
+    @classmethod
+    def load(cls, path, stride=1024):
+        return cls(*read_log(path), stride=stride)
+
+    def __len__(self):
+        return len(self.actions)
+
+    def seek(self, index):
+        # State after the first `index` logged actions: (fight number, turn in fight, player, enemy).
+        index = max(0, min(index, len(self.actions)))
+        snap = self.snapshots[min(index // self.stride, len(self.snapshots) - 1)]
+        pos, fight, turn, player, enemy, state = snap
+        player, enemy = copy.copy(player), copy.copy(enemy)
+        rng = random.Random()
+        rng.setstate(state)
+        while pos < index:
+            if not (player.is_alive() and enemy.is_alive()):
+                player, enemy = new_fight()
+                fight, turn = fight + 1, 1
+            player_action(player, enemy, self.actions[pos], rng, quiet)
+            if enemy.is_alive():
+                enemy_action(enemy, player, rng, quiet)
+                player.update_status()
+                enemy.update_status()
+                turn += 1
+            pos += 1
+            if pos % self.stride == 0 and pos // self.stride == len(self.snapshots):
+                self.snapshots.append((pos, fight, turn, copy.copy(player), copy.copy(enemy), rng.getstate()))
+        return fight, turn, player, enemy
+
 def main():
-    while True:
-        clear_screen()
-        print(color_text("Welcome to the Strategic Turn-Based Combat Game!", CYAN))
-        game_loop()
-        again = input("\nPlay again? (y/n): ").strip().lower()
-        if again != 'y':
-            break
+    parser = argparse.ArgumentParser(description="Strategic Turn-Based Combat Game")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--log", help="record the session's actions to this file")
+    parser.add_argument("--replay", help="fast-forward a recorded session instead of playing")
+    parser.add_argument("--action", type=int, default=None,
+                        help="number of logged actions to replay (default: all)")
+    args = parser.parse_args()
+    if args.seed is not None and not -2 ** 63 <= args.seed < 2 ** 63:
+        parser.error("--seed must fit in a signed 64-bit integer")
+
+    if args.replay:
+        replay = Replay.load(args.replay)
+        fight, turn, player, enemy = replay.seek(len(replay) if args.action is None else args.action)
+        print(color_text(f"Fight {fight + 1}, turn {turn}", YELLOW))
+        display_status(player, enemy)
+        return
+
+    seed = random.SystemRandom().getrandbits(63) if args.seed is None else args.seed
+    rng = random.Random(seed)
+    log = ActionLog(args.log, seed) if args.log else None
+    try:
+        while True:
+            clear_screen()
+            print(color_text("Welcome to the Strategic Turn-Based Combat Game!", CYAN))
+            game_loop(rng, log)
+            again = input("\nPlay again? (y/n): ").strip().lower()
+            if again != 'y':
+                break
+    finally:
+        if log:
+            log.close()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,215 @@
+import argparse, asyncio, random, sys, time
+
+from game_3shot import (CYAN, GREEN, RED, YELLOW, color_text, status_line, action_menu,
+                        player_action, enemy_action, new_fight)
+
+CLEAR = "\033[H\033[2J"
+
+
+class Renderer:
+    # Collects a frame of text and emits it in one write on flush().
+    def __init__(self):
+        self.buffer = []
+
+    def clear(self):
+        self.buffer.append(CLEAR)
+
+    def write(self, text=""):
+        self.buffer.append(f"{text}\n")
+
+    async def flush(self):
+        text = "".join(self.buffer)
+        self.buffer.clear()
+        await self.emit(text)
+
+    async def emit(self, text):
+        pass
+
+
+class AnsiRenderer(Renderer):
+    def __init__(self, stream=sys.stdout):
+        super().__init__()
+        self.stream = stream
+
+    async def emit(self, text):
+        self.stream.write(text)
+        self.stream.flush()
+
+
+class StreamRenderer(Renderer):
+    def __init__(self, writer):
+        super().__init__()
+        self.writer = writer
+
+    async def emit(self, text):
+        self.writer.write(text.replace("\n", "\r\n").encode())
+        await self.writer.drain()
+
+    async def close(self):
+        # Wait for the transport to shut down, so the socket is released before the
+        # handler returns; a peer that already reset the connection is nothing to report
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class NullRenderer(Renderer):
+    def __init__(self):
+        super().__init__()
+        self.bytes = 0
+
+    async def emit(self, text):
+        self.bytes += len(text)
+
+
+class StdinSource:
+    async def readline(self, session):
+        line = await asyncio.get_running_loop().run_in_executor(None, sys.stdin.readline)
+        if not line:
+            raise EOFError
+        return line
+
+
+class StreamSource:
+    def __init__(self, reader):
+        self.reader = reader
+
+    async def readline(self, session):
+        line = await self.reader.readline()
+        if not line:
+            raise EOFError
+        return line.decode(errors="replace")
+
+
+class BotSource:
+    # Scripted player: picks the special when ready, heals when low, otherwise attacks,
+    # and asks for `games` fights in total.
+    def __init__(self, games=1):
+        self.games = games
+
+    async def readline(self, session):
+        if session.prompt == "again":
+            return "y" if session.games_played < self.games else "n"
+        player = session.player
+        if player.hp < player.max_hp * 0.4 and player.heal_count > 0:
+            return "5"
+        return "4" if player.special_cooldown == 0 else "1"
+
+
+class GameSession:
+    def __init__(self, source, renderer, rng=None, delay=1.0):
+        self.source = source
+        self.renderer = renderer
+        self.rng = rng or random.Random()
+        self.delay = delay
+        self.player = self.enemy = None
+        self.prompt = None
+        self.games_played = 0
+        self.turns = 0
+
+    async def ask(self, prompt, kind):
+        self.prompt = kind
+        self.renderer.write(prompt)
+        await self.renderer.flush()
+        return (await self.source.readline(self)).strip()
+
+    async def pause(self):
+        await self.renderer.flush()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+    async def player_turn(self):
+        r = self.renderer
+        while True:
+            r.write(status_line(self.player, self.enemy))
+            for line in action_menu(self.player):
+                r.write(line)
+            choice = await self.ask("Action: ", "action")
+            if player_action(self.player, self.enemy, choice, self.rng, r.write):
+                break
+            r.write("Invalid action. Try again.")
+        await self.pause()
+
+    async def game_loop(self):
+        r = self.renderer
+        self.player, self.enemy = new_fight()
+        turn = 1
+        while self.player.is_alive() and self.enemy.is_alive():
+            r.clear()
+            r.write(color_text(f"--- Turn {turn} ---", YELLOW))
+            await self.player_turn()
+            self.turns += 1
+            if not self.enemy.is_alive():
+                break
+            enemy_action(self.enemy, self.player, self.rng, r.write)
+            await self.pause()
+            self.player.update_status()
+            self.enemy.update_status()
+            turn += 1
+        r.clear()
+        if self.player.is_alive():
+            r.write(color_text("Victory! You have triumphed over your foe.", GREEN))
+        else:
+            r.write(color_text("Defeat... You have fallen in battle.", RED))
+        self.games_played += 1
+
+    async def run(self):
+        try:
+            while True:
+                self.renderer.clear()
+                self.renderer.write(color_text("Welcome to the Strategic Turn-Based Combat Game!", CYAN))
+                await self.game_loop()
+                if (await self.ask("\nPlay again? (y/n): ", "again")).lower() != 'y':
+                    break
+            await self.renderer.flush()
+        except (EOFError, ConnectionError):
+            pass
+
+
+async def serve(host, port, delay):
+    async def handle(reader, writer):
+        renderer = StreamRenderer(writer)
+        try:
+            await GameSession(StreamSource(reader), renderer, delay=delay).run()
+        finally:
+            await renderer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"Serving on {', '.join(str(s.getsockname()) for s in server.sockets)}")
+    async with server:
+        await server.serve_forever()
+
+
+async def load_test(sessions, games, delay):
+    runs = [GameSession(BotSource(games), NullRenderer(), random.Random(i), delay) for i in range(sessions)]
+    start = time.perf_counter()
+    await asyncio.gather(*(s.run() for s in runs))
+    elapsed = time.perf_counter() - start
+    turns = sum(s.turns for s in runs)
+    longest = max(s.turns for s in runs)
+    print(f"{sessions} concurrent sessions, {sessions * games} games, {turns} turns in {elapsed:.2f}s")
+    print(f"{turns / elapsed:,.0f} turns/sec; longest session {longest} turns "
+          f"(~{longest * 2 * delay:.2f}s of pauses if run alone)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="asyncio front end for game_3shot")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="play over TCP instead of stdin")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--delay", type=float, default=1.0, help="pause after each move, in seconds")
+    parser.add_argument("--load-test", type=int, metavar="N", help="run N scripted sessions concurrently")
+    parser.add_argument("--games", type=int, default=1, help="games per scripted session")
+    args = parser.parse_args()
+
+    if args.load_test:
+        asyncio.run(load_test(args.load_test, args.games, args.delay))
+    elif args.serve:
+        asyncio.run(serve(args.host, args.serve, args.delay))
+    else:
+        asyncio.run(GameSession(StdinSource(), AnsiRenderer(), delay=args.delay).run())
+
+
+if __name__ == '__main__':
+    main()
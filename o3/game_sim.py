@@ -0,0 +1,207 @@
+import argparse, time
+
+import numpy as np
+
+from combatant_array import CombatantArray
+from game_3shot import Combatant
+
+# Action codes match the menu numbers in player_turn.
+ATTACK, DEFEND, DODGE, SPECIAL, HEAL, CHARGE = 1, 2, 3, 4, 5, 6
+
+
+def hero():
+    return Combatant("Hero", 120, 25, 8, heal_count=2)
+
+
+def goblin_warlord():
+    return Combatant("Goblin Warlord", 100, 20, 6, heal_count=1)
+
+
+def basic_attack(attacker, defender, i, rng):
+    charged = attacker.charged[i]
+    mult = rng.uniform(0.9, 1.1, i.size)
+    bonus = np.where(charged, 1.5, 1.0)
+    attacker.charged[i] = False
+    attacker.charge_turns_left[i[charged]] = 0
+    dmg = (attacker.attack[i] * mult * bonus).astype(np.int64) - defender.defense[i]
+    np.maximum(dmg, 0, out=dmg)
+    dmg[rng.random(i.size) < 0.1] *= 2
+    dmg[defender.dodging[i] & (rng.random(i.size) < 0.5)] = 0
+    dmg[defender.defending[i]] //= 2
+    return defender.take_damage(dmg, i)
+
+
+def special_attack(attacker, defender, i, rng):
+    mult = rng.uniform(1.5, 2.0, i.size)
+    dmg = (attacker.attack[i] * mult).astype(np.int64) - (defender.defense[i] * 0.75).astype(np.int64)
+    np.maximum(dmg, 0, out=dmg)
+    dmg[rng.random(i.size) < 0.1] *= 2
+    dmg[defender.dodging[i] & (rng.random(i.size) < 0.4)] = 0
+    dmg[defender.defending[i]] //= 2
+    return defender.take_damage(dmg, i)
+
+
+def heal_target(target, i, rng):
+    amount = rng.integers(15, 26, i.size)
+    target.hp[i] = np.minimum(target.hp[i] + amount, target.max_hp[i])
+    return amount
+
+
+def charge_target(attacker, i):
+    attacker.charged[i] = True
+    attacker.charge_turns_left[i] = 1
+
+
+def enemy_decision(enemy, player, rng):
+    n = len(enemy)
+    roll = rng.random(n)
+    action = np.select([roll < 0.5, roll < 0.7, roll < 0.85], [ATTACK, DEFEND, DODGE], CHARGE)
+    action[enemy.charged] = ATTACK
+    action[(enemy.special_cooldown == 0) & (rng.random(n) < 0.3)] = SPECIAL
+    action[(enemy.hp < enemy.max_hp * 0.3) & (enemy.heal_count > 0)] = HEAL
+    return action
+
+
+# Player policies take (player, enemy, rng) and return one action code per lane.
+# Unavailable choices (special on cooldown, heal with none left) fall back to ATTACK.
+
+def attack_policy(player, enemy, rng):
+    return np.full(len(player), ATTACK)
+
+
+def random_policy(player, enemy, rng):
+    # Uniform over the choices currently on the menu.
+    score = rng.random((len(player), CHARGE))
+    score[player.special_cooldown != 0, SPECIAL - 1] = -1
+    score[player.heal_count <= 0, HEAL - 1] = -1
+    return score.argmax(axis=1) + ATTACK
+
+
+def aggressive_policy(player, enemy, rng):
+    action = np.full(len(player), ATTACK)
+    action[player.special_cooldown == 0] = SPECIAL
+    action[(player.hp < player.max_hp * 0.4) & (player.heal_count > 0)] = HEAL
+    return action
+
+
+POLICIES = {"attack": attack_policy, "random": random_policy, "aggressive": aggressive_policy}
+
+
+def act(actor, target, action, active, rng, recharge_attacks):
+    # recharge_attacks: the enemy turns a repeated charge into a basic attack, the player just loses the turn.
+    dmg = np.zeros(len(actor), dtype=np.int64)
+    charged = actor.charged.copy()
+    attack = action == ATTACK
+    if recharge_attacks:
+        attack |= (action == CHARGE) & charged
+    i = np.flatnonzero(active & attack)
+    dmg[i] = basic_attack(actor, target, i, rng)
+    actor.defending[active & (action == DEFEND)] = True
+    actor.dodging[active & (action == DODGE)] = True
+    i = np.flatnonzero(active & (action == SPECIAL))
+    dmg[i] = special_attack(actor, target, i, rng)
+    actor.special_cooldown[i] = 3
+    i = np.flatnonzero(active & (action == HEAL))
+    heal_target(actor, i, rng)
+    actor.heal_count[i] -= 1
+    return dmg, np.flatnonzero(active & (action == CHARGE) & ~charged)
+
+
+class SimResult:
+    def __init__(self, outcome, turns, dealt, taken):
+        self.outcome = outcome
+        self.turns = turns
+        self.dealt = dealt
+        self.taken = taken
+
+    @property
+    def fights(self):
+        return self.outcome.size
+
+    @property
+    def win_rate(self):
+        return np.count_nonzero(self.outcome == 1) / self.fights
+
+    @property
+    def unresolved(self):
+        return np.count_nonzero(self.outcome == 0)
+
+    def turn_distribution(self):
+        return np.bincount(self.turns)
+
+    def damage_histogram(self, bins=20):
+        edges = np.linspace(0, max(self.dealt.max(), self.taken.max()) + 1, bins + 1)
+        return np.histogram(self.dealt, edges)[0], np.histogram(self.taken, edges)[0], edges
+
+
+def simulate_batch(n, policy, player, enemy, rng, max_turns):
+    p = CombatantArray.from_template(player, n)
+    e = CombatantArray.from_template(enemy, n)
+    lane = np.arange(n)
+    outcome = np.zeros(n, dtype=np.int8)
+    turns = np.full(n, max_turns, dtype=np.int64)
+    dealt = np.zeros(n, dtype=np.int64)
+    taken = np.zeros(n, dtype=np.int64)
+    for turn in range(1, max_turns + 1):
+        if lane.size == 0:
+            break
+        everyone = np.ones(lane.size, dtype=bool)
+        action = np.asarray(policy(p, e, rng))
+        invalid = ((action == SPECIAL) & (p.special_cooldown != 0)) | \
+                  ((action == HEAL) & (p.heal_count <= 0)) | (action < ATTACK) | (action > CHARGE)
+        action = np.where(invalid, ATTACK, action)
+        dmg, charging = act(p, e, action, everyone, rng, False)
+        charge_target(p, charging)
+        dealt[lane] += dmg
+        won = ~e.is_alive()
+        dmg, charging = act(e, p, enemy_decision(e, p, rng), ~won, rng, True)
+        charge_target(e, charging)
+        taken[lane] += dmg
+        lost = ~p.is_alive()
+        p.update_status()
+        e.update_status()
+        done = won | lost
+        if done.any():
+            turns[lane[done]] = turn
+            outcome[lane[won]] = 1
+            outcome[lane[lost]] = -1
+            keep = ~done
+            lane = lane[keep]
+            p.compact(keep)
+            e.compact(keep)
+    return outcome, turns, dealt, taken
+
+
+def simulate(n, policy=aggressive_policy, player=None, enemy=None, seed=None,
+             max_turns=1000, batch_size=1 << 20):
+    rng = np.random.default_rng(seed)
+    player = player or hero()
+    enemy = enemy or goblin_warlord()
+    parts = [simulate_batch(min(batch_size, n - start), policy, player, enemy, rng, max_turns)
+             for start in range(0, n, batch_size)]
+    return SimResult(*(np.concatenate(a) for a in zip(*parts)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Monte Carlo for game_3shot fights")
+    parser.add_argument("-n", "--fights", type=int, default=1_000_000)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="aggressive")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = simulate(args.fights, POLICIES[args.policy], seed=args.seed)
+    elapsed = time.perf_counter() - start
+
+    print(f"{result.fights} fights in {elapsed:.2f}s ({result.fights / elapsed * 60:,.0f} fights/min)")
+    print(f"Win rate: {result.win_rate:.4f}  unresolved: {result.unresolved}")
+    dist = result.turn_distribution()
+    print("Turns:", ", ".join(f"{t}:{c}" for t, c in enumerate(dist) if c))
+    dealt, taken, edges = result.damage_histogram()
+    print("Damage dealt/taken per fight:")
+    for lo, hi, d, t in zip(edges[:-1], edges[1:], dealt, taken):
+        print(f"  {lo:6.0f}-{hi:<6.0f} {d:9d} {t:9d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+import argparse, math, time
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+
+from game_sim import ATTACK, DEFEND, DODGE, SPECIAL, HEAL, CHARGE, hero, goblin_warlord, simulate
+
+ACTIONS = (ATTACK, DEFEND, DODGE, SPECIAL, HEAL, CHARGE)
+ACTION_NAMES = {ATTACK: "Attack", DEFEND: "Defend", DODGE: "Dodge",
+                SPECIAL: "Special Attack", HEAL: "Heal", CHARGE: "Charge"}
+HEAL_AMOUNTS = tuple((amount, 1 / 11) for amount in range(15, 26))
+
+
+@lru_cache(maxsize=None)
+def roll_distribution(attack, lo, hi, bonus):
+    # int(attack * uniform(lo, hi) * bonus) is the floor of a uniform variable,
+    # so each integer gets the length of its unit interval inside [a, b].
+    a, b = attack * lo * bonus, attack * hi * bonus
+    return tuple((k, (min(k + 1, b) - max(k, a)) / (b - a))
+                 for k in range(math.floor(a), math.ceil(b)) if min(k + 1, b) > max(k, a))
+
+
+@lru_cache(maxsize=None)
+def hit_distribution(attack, reduction, lo, hi, bonus, dodge_chance, dodging, defending):
+    out = defaultdict(float)
+    for k, w in roll_distribution(attack, lo, hi, bonus):
+        base = max(k - reduction, 0)
+        for dmg, p in ((base * 2, w * 0.1), (base, w * 0.9)):
+            if dodging:
+                out[0] += p * dodge_chance
+                p *= 1 - dodge_chance
+            out[dmg // 2 if defending else dmg] += p
+    return tuple(out.items())
+
+
+def basic_hit(attacker, defender, charged, dodging=False, defending=False):
+    return hit_distribution(attacker.attack, defender.defense, 0.9, 1.1, 1.5 if charged else 1.0,
+                            0.5, dodging, defending)
+
+
+def special_hit(attacker, defender, dodging=False, defending=False):
+    return hit_distribution(attacker.attack, int(defender.defense * 0.75), 1.5, 2.0, 1.0,
+                            0.4, dodging, defending)
+
+
+def tick(cooldown, charge):
+    return max(cooldown - 1, 0), max(charge - 1, 0)
+
+
+class FightSolver:
+    # A state is (player hp, enemy hp, player cooldown, enemy cooldown, player heals,
+    # enemy heals, player charge turns, enemy charge turns) at the start of a turn.
+    # Defending/dodging only live inside a turn (update_status clears them), so they
+    # appear in the mid-turn "chance" states between the player's and enemy's moves.
+    #
+    # Heals are the only thing that raises hp, and they use up a heal, so states are
+    # grouped into layers by (player heals, enemy heals). Each layer is a memoized
+    # table over (flags, player hp, enemy hp) kept in an LRU-bounded cache; solving a
+    # layer pulls in the two layers one heal below. Inside a layer every turn either
+    # lowers player hp + enemy hp or leaves both unchanged, so the layer is swept one
+    # hp anti-diagonal at a time, vectorized over its cells, and the zero-damage loops
+    # between flag combinations on a cell are solved exactly by policy iteration.
+    def __init__(self, player=None, enemy=None, cache_size=None):
+        self.player = player or hero()
+        self.enemy = enemy or goblin_warlord()
+        self.P, self.E = self.player.max_hp, self.enemy.max_hp
+        # Solving a layer needs its neighbours one heal down, so two rows of layers suffice.
+        self.layer = lru_cache(maxsize=cache_size or 2 * self.enemy.heal_count + 4)(self._solve_layer)
+        self._reachable_modes()
+
+    def initial_state(self):
+        p, e = self.player, self.enemy
+        return (p.hp, e.hp, p.special_cooldown, e.special_cooldown, p.heal_count, e.heal_count,
+                p.charge_turns_left if p.charged else 0, e.charge_turns_left if e.charged else 0)
+
+    # Flag transitions, ignoring hp: mode = (pcd, ecd, pchg, echg),
+    # mid = (pcd, ecd, pchg, echg, defending, dodging).
+
+    def player_moves(self, mode, can_heal=True):
+        pcd, ecd, pchg, echg = mode
+        p, e = self.player, self.enemy
+        # action -> [(prob, enemy damage, heal amount, mid)]
+        moves = {ATTACK: [(w, d, 0, (pcd, ecd, 0, echg, False, False)) for d, w in basic_hit(p, e, pchg > 0)],
+                 DEFEND: [(1.0, 0, 0, (pcd, ecd, pchg, echg, True, False))],
+                 DODGE: [(1.0, 0, 0, (pcd, ecd, pchg, echg, False, True))],
+                 CHARGE: [(1.0, 0, 0, (pcd, ecd, pchg or 1, echg, False, False))]}
+        if pcd == 0:
+            moves[SPECIAL] = [(w, d, 0, (3, ecd, pchg, echg, False, False)) for d, w in special_hit(p, e)]
+        if can_heal:
+            moves[HEAL] = [(w, 0, a, (pcd, ecd, pchg, echg, False, False)) for a, w in HEAL_AMOUNTS]
+        return moves
+
+    def enemy_moves(self, mid, heals):
+        pcd, ecd, pchg, echg, defending, dodging = mid
+        p, e = self.player, self.enemy
+        # [(prob, player damage, heal amount, next mode)] after both update_status calls
+        pcd, pchg = tick(pcd, pchg)
+        if heals:
+            ncd, nchg = tick(ecd, echg)
+            return [(w, 0, a, (pcd, ncd, pchg, nchg)) for a, w in HEAL_AMOUNTS]
+        out = []
+        special = 0.3 if ecd == 0 else 0.0
+        if special:
+            ncd, nchg = tick(3, echg)
+            out += [(special * w, d, 0, (pcd, ncd, pchg, nchg)) for d, w in special_hit(e, p, dodging, defending)]
+        rest = 1.0 - special
+        ncd, nchg = tick(ecd, 0)
+        out += [((rest if echg else rest * 0.5) * w, d, 0, (pcd, ncd, pchg, nchg))
+                for d, w in basic_hit(e, p, echg > 0, dodging, defending)]
+        if not echg:
+            out.append((rest * 0.35, 0, 0, (pcd, ncd, pchg, 0)))
+            ncd, nchg = tick(ecd, 1)
+            out.append((rest * 0.15, 0, 0, (pcd, ncd, pchg, nchg)))
+        return [o for o in out if o[0] > 0]
+
+    def _reachable_modes(self):
+        # Flag combinations reachable from the starting flags; everything else is pruned.
+        s = self.initial_state()
+        start = (s[2], s[3], s[6], s[7])
+        modes, mids, stack = {start}, set(), [start]
+        while stack:
+            for outs in self.player_moves(stack.pop()).values():
+                for *_, mid in outs:
+                    if mid in mids:
+                        continue
+                    mids.add(mid)
+                    for heals in (False, True):
+                        for *_, mode in self.enemy_moves(mid, heals):
+                            if mode not in modes:
+                                modes.add(mode)
+                                stack.append(mode)
+        self.modes = sorted(modes)
+        self.mids = sorted(mids)
+        self.mode_index = {m: i for i, m in enumerate(self.modes)}
+        self.mid_index = {m: i for i, m in enumerate(self.mids)}
+
+    def _tables(self, ph, eh):
+        nm, nc, na = len(self.modes), len(self.mids), len(ACTIONS)
+        # Enemy side: damaging outcomes gathered from V, zero-damage ones go to T_E.
+        enemy = []
+        T_E = np.zeros((nc, nm))
+        for c, mid in enumerate(self.mids):
+            dmg = [(w, d, self.mode_index[m]) for w, d, _, m in self.enemy_moves(mid, False) if d > 0]
+            for w, d, _, m in self.enemy_moves(mid, False):
+                if d == 0:
+                    T_E[c, self.mode_index[m]] += w
+            heal = [(w, a, self.mode_index[m]) for w, _, a, m in self.enemy_moves(mid, True)] if eh else []
+            enemy.append((np.array(dmg).reshape(-1, 3).T, np.array(heal).reshape(-1, 3).T))
+        # Player side: damaging and healing outcomes gathered from W, zero-damage ones go to T_P.
+        player = {}
+        T_P = np.zeros((nm, na, nc))
+        valid = np.zeros((nm, na), dtype=bool)
+        for m, mode in enumerate(self.modes):
+            for action, outs in self.player_moves(mode, ph > 0).items():
+                a = ACTIONS.index(action)
+                valid[m, a] = True
+                dmg = [(w, d, self.mid_index[mid]) for w, d, h, mid in outs if d > 0]
+                heal = [(w, h, self.mid_index[mid]) for w, d, h, mid in outs if h > 0]
+                for w, d, h, mid in outs:
+                    if d == 0 and h == 0:
+                        T_P[m, a, self.mid_index[mid]] += w
+                player[m, a] = (np.array(dmg).reshape(-1, 3).T, np.array(heal).reshape(-1, 3).T)
+        return enemy, T_E, player, T_P, valid
+
+    def _solve_layer(self, ph, eh):
+        P, E = self.P, self.E
+        nm, nc, na = len(self.modes), len(self.mids), len(ACTIONS)
+        below_p = self.layer(ph - 1, eh) if ph else None
+        below_e = self.layer(ph, eh - 1) if eh else None
+        enemy, T_E, player, T_P, valid = self._tables(ph, eh)
+
+        V = np.zeros((nm, P + 1, E + 1))
+        W = np.zeros((nc, P + 1, E + 1))
+        W[:, :, 0] = 1.0
+        policy = np.zeros((nm, P + 1, E + 1), dtype=np.int8)
+        Vf, Wf = V.reshape(nm, -1), W.reshape(nc, -1)
+        heal_cond = (np.arange(E + 1) < E * 0.3) & (eh > 0)
+        mask = np.where(valid, 0.0, -np.inf)
+
+        for d in range(2, P + E + 1):
+            p = np.arange(max(1, d - E), min(P, d - 1) + 1)
+            e = d - p
+            hc = heal_cond[e]
+            # Enemy move: W = W_ext + T_E(cell) . V(cell)
+            W_ext = np.empty((nc, p.size))
+            for c, ((w, dp, m), (hw, ha, hm)) in enumerate(enemy):
+                idx = np.maximum(p - dp[:, None].astype(int), 0) * (E + 1) + e
+                W_ext[c] = w @ Vf[m.astype(int)[:, None], idx] if w.size else 0.0
+                if hc.any():
+                    hidx = p * (E + 1) + np.minimum(e + ha[:, None].astype(int), E)
+                    healed = hw @ below_e[0].reshape(nm, -1)[hm.astype(int)[:, None], hidx]
+                    W_ext[c] = np.where(hc, healed, W_ext[c])
+            T_cell = np.where(hc[:, None, None], 0.0, T_E[None])          # (cells, nc, nm)
+            # Player move: Q = Q_ext + T(cell) . V(cell)
+            Q_ext = np.zeros((p.size, nm, na))
+            for (m, a), ((w, de, c), (hw, ha, hc_)) in player.items():
+                if w.size:
+                    idx = p * (E + 1) + np.maximum(e - de[:, None].astype(int), 0)
+                    Q_ext[:, m, a] += w @ Wf[c.astype(int)[:, None], idx]
+                if hw.size:
+                    hidx = np.minimum(p + ha[:, None].astype(int), P) * (E + 1) + e
+                    Q_ext[:, m, a] += hw @ below_p[1].reshape(nc, -1)[hc_.astype(int)[:, None], hidx]
+            Q_ext += np.einsum('mac,cx->xma', T_P, W_ext)
+            T = np.einsum('mac,xcn->xman', T_P, T_cell)                   # (cells, nm, na, nm)
+            v, pi = self._policy_iteration(Q_ext + mask, T)
+            V[:, p, e] = v.T
+            policy[:, p, e] = np.asarray(ACTIONS)[pi].T
+            W[:, p, e] = W_ext + np.einsum('xcn,xn->cx', T_cell, v)
+        return V, W, policy
+
+    def _policy_iteration(self, Q_ext, T, tol=1e-14):
+        cells, nm, na = Q_ext.shape
+        rows = np.arange(cells)[:, None]
+        cols = np.arange(nm)[None, :]
+        pi = Q_ext.argmax(axis=2)
+        eye = np.eye(nm)
+        for _ in range(100):
+            T_pi = T[rows, cols, pi]
+            try:
+                v = np.linalg.solve(eye - T_pi, Q_ext[rows, cols, pi][..., None])[..., 0]
+            except np.linalg.LinAlgError:
+                return self._value_iteration(Q_ext, T)
+            Q = Q_ext + np.einsum('xman,xn->xma', T, v)
+            best = Q.argmax(axis=2)
+            improve = Q[rows, cols, best] > Q[rows, cols, pi] + tol
+            if not improve.any():
+                return v, pi
+            pi = np.where(improve, best, pi)
+        return v, pi
+
+    def _value_iteration(self, Q_ext, T, tol=1e-13):
+        v = np.zeros(Q_ext.shape[:2])
+        while True:
+            Q = Q_ext + np.einsum('xman,xn->xma', T, v)
+            new = Q.max(axis=2)
+            if np.abs(new - v).max() <= tol:
+                return new, Q.argmax(axis=2)
+            v = new
+
+    def _lookup(self, state):
+        php, ehp, pcd, ecd, pheal, eheal, pchg, echg = state
+        V, _, policy = self.layer(pheal, eheal)
+        m = self.mode_index[(pcd, ecd, pchg, echg)]
+        return V[m, php, ehp], policy[m, php, ehp]
+
+    def win_probability(self, state=None):
+        return float(self._lookup(state or self.initial_state())[0])
+
+    def best_action(self, state=None):
+        return int(self._lookup(state or self.initial_state())[1])
+
+    def as_policy(self):
+        # Vectorized player policy for game_sim.simulate that plays the optimal action in every lane.
+        def policy(player, enemy, rng):
+            action = np.full(len(player), ATTACK)
+            code = np.full((4, 4, 2, 2), -1)
+            for i, (pcd, ecd, pchg, echg) in enumerate(self.modes):
+                code[pcd, ecd, min(pchg, 1), min(echg, 1)] = i
+            m = code[player.special_cooldown, enemy.special_cooldown,
+                     player.charged.astype(int), enemy.charged.astype(int)]
+            for ph, eh in set(zip(player.heal_count.tolist(), enemy.heal_count.tolist())):
+                lane = (player.heal_count == ph) & (enemy.heal_count == eh)
+                table = self.layer(ph, eh)[2]
+                action[lane] = table[m[lane], player.hp[lane], enemy.hp[lane]]
+            return action
+        return policy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact win probability and optimal policy for game_3shot")
+    parser.add_argument("--check", type=int, default=0, metavar="N",
+                        help="also run N Monte Carlo fights with the optimal policy")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    solver = FightSolver()
+    win = solver.win_probability()
+    elapsed = time.perf_counter() - start
+    cells = (solver.P + 1) * (solver.E + 1)
+    print(f"Win probability with optimal play: {win:.12f}")
+    print(f"Optimal opening: {ACTION_NAMES[solver.best_action()]}")
+    print(f"{len(solver.modes)} reachable flag states x {cells} hp cells per heal layer, "
+          f"solved in {elapsed:.2f}s")
+    if args.check:
+        result = simulate(args.check, solver.as_policy(), seed=0)
+        print(f"Monte Carlo check over {args.check} fights: {result.win_rate:.6f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+import multiprocessing
+import os
+import time
+from functools import partial
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from viz3 import ParticleSystem, TrailBuffer
+
+# ParticleSystem stepped by a persistent pool of worker processes. positions, velocities
+# and the trail ring buffer live in shared memory blocks; each worker runs an ordinary
+# ParticleSystem over its slice of particles, with the slice's rows of those blocks as its
+# state, so no array is pickled after start-up. A step is one round of a barrier: the
+# parent writes t to a shared control block and waits with the workers to start them, then
+# waits again for them to finish. Every particle's update depends only on itself and t,
+# so the results are bit-identical to the serial ParticleSystem.
+
+_T, _STOP = 0, 1  # Slots of the control block
+
+
+def _attach(name, shape, dtype):
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype, buffer=block.buf)
+
+
+def _worker(spec, lo, hi, barrier):
+    blocks = {}
+    arrays = {}
+    for key, (name, shape, dtype) in spec["blocks"].items():
+        blocks[key], arrays[key] = _attach(name, shape, dtype)
+    trails = arrays.get("trails")
+    ps = None
+    try:
+        ps = ParticleSystem(hi - lo, spec["dt"], spec["boundary"], spec["G"], spec["damping"],
+                            spec["trail_length"],
+                            trail_store=None if trails is None else partial(TrailBuffer, buffer=trails[:, lo:hi]),
+                            dtype=spec["dtype"], positions=arrays["positions"][lo:hi],
+                            velocities=arrays["velocities"][lo:hi])
+        control = arrays["control"]
+        while True:
+            barrier.wait()
+            if control[_STOP]:
+                break
+            ps.update(control[_T])
+            barrier.wait()
+    except BaseException:
+        barrier.abort()  # The parent's wait raises BrokenBarrierError instead of hanging
+        raise
+    finally:
+        # Drop the views before closing the blocks they point into
+        ps = trails = None
+        arrays.clear()
+        for block in blocks.values():
+            block.close()
+
+
+class SharedParticleSystem:
+    # Same arguments and update(t) as ParticleSystem, plus workers (default: all cores),
+    # except that the trails are always a TrailBuffer: trails=False keeps none, like
+    # ParticleSystem's trail_store=None. The initial state is drawn exactly as ParticleSystem
+    # draws it. Self-gravity couples every particle to every other and is not supported.
+    # Call close() (or use it as a context manager) to stop the workers and free the shared
+    # memory.
+    def __init__(self, num_particles, dt, boundary, G, damping, trail_length, trails=True,
+                 dtype=np.float64, workers=None):
+        self.num_particles = num_particles
+        self.trail_length = trail_length
+        self.workers = workers or os.cpu_count() or 1
+        self._blocks = []
+        self._processes = []
+        spec = {"dt": dt, "boundary": boundary, "G": G, "damping": damping, "trail_length": trail_length,
+                "dtype": np.dtype(dtype), "blocks": {}}
+        try:
+            initial = ParticleSystem(num_particles, dt, boundary, G, damping, 0, trail_store=None, dtype=dtype)
+            self.positions = self._shared(spec, "positions", initial.positions.shape, dtype)
+            self.velocities = self._shared(spec, "velocities", initial.velocities.shape, dtype)
+            self.positions[:] = initial.positions
+            self.velocities[:] = initial.velocities
+            del initial
+            self.trail_store = None
+            if trails:
+                buffer = self._shared(spec, "trails", (2 * trail_length, num_particles, 2), dtype)
+                buffer[:] = self.positions
+                self.trail_store = TrailBuffer(self.positions, trail_length, buffer=buffer)
+            self.control = self._shared(spec, "control", (2,), np.float64)
+            self.control[:] = 0
+            self.scalar = np.dtype(dtype).type
+
+            context = multiprocessing.get_context()
+            self.barrier = context.Barrier(self.workers + 1)
+            bounds = np.linspace(0, num_particles, self.workers + 1).astype(int)
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                process = context.Process(target=_worker, args=(spec, lo, hi, self.barrier), daemon=True)
+                process.start()
+                self._processes.append(process)
+        except BaseException:
+            self.close()
+            raise
+
+    def _shared(self, spec, key, shape, dtype):
+        dtype = np.dtype(dtype)
+        block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+        self._blocks.append(block)
+        spec["blocks"][key] = (block.name, shape, dtype)
+        return np.ndarray(shape, dtype, buffer=block.buf)
+
+    @property
+    def trails(self):
+        return self.trail_store.ordered().transpose(1, 0, 2)
+
+    def update(self, t):
+        self.control[_T] = t
+        self.barrier.wait()  # Start the step
+        self.barrier.wait()  # Every slice is done
+        trail_store = self.trail_store
+        if trail_store is not None:
+            # The workers wrote the new rows; move the head to match
+            trail_store.head = (trail_store.head + 1) % trail_store.length
+        scalar = self.scalar
+        c, s = np.cos(t * 0.5), np.sin(t * 0.5)
+        a1 = np.array([scalar(8 * c), scalar(6 * s)])
+        a2 = np.array([scalar(-8 * c), scalar(-6 * s)])
+        return a1, a2, self.positions, self.velocities, self.trails if trail_store is not None else None
+
+    def close(self):
+        if self._processes:
+            self.control[_STOP] = 1
+            try:
+                self.barrier.wait(timeout=10)
+            except Exception:
+                pass  # A worker already failed and broke the barrier
+            for process in self._processes:
+                process.join(timeout=10)
+                if process.is_alive():
+                    process.terminate()
+            self._processes = []
+        # Drop the views before closing the blocks they point into
+        self.positions = self.velocities = self.control = self.trail_store = None
+        for block in self._blocks:
+            try:
+                block.close()
+            except BufferError:
+                pass  # The caller still holds an array from update(); it is unmapped when freed
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def benchmark(num_particles=10 ** 6, steps=20, trail_length=10, check=10 ** 4):
+    # Steps/sec of the serial ParticleSystem and of SharedParticleSystem from 1 worker to
+    # all cores, with trails. Each parallel run's positions, velocities and trails are
+    # compared with the serial run's.
+    cores = os.cpu_count() or 1
+    counts = sorted({1, cores} | {2 ** k for k in range(1, cores.bit_length()) if 2 ** k < cores})
+    np.random.seed(42)
+    serial = ParticleSystem(num_particles, 0.05, 20, 50, 0.99, trail_length)
+    start = time.perf_counter()
+    for step in range(steps):
+        serial.update(step * 0.05)
+    baseline = steps / (time.perf_counter() - start)
+    print(f"{num_particles} particles, trail length {trail_length}")
+    print(f"{'serial':>12s} {baseline:8.2f} steps/sec")
+    for workers in counts:
+        np.random.seed(42)
+        with SharedParticleSystem(num_particles, 0.05, 20, 50, 0.99, trail_length, workers=workers) as ps:
+            ps.update(0.0)  # The first step waits for the workers to start
+            start = time.perf_counter()
+            for step in range(1, steps):
+                ps.update(step * 0.05)
+            rate = (steps - 1) / (time.perf_counter() - start)
+            same = (np.array_equal(ps.positions, serial.positions) and np.array_equal(ps.velocities, serial.velocities)
+                    and np.array_equal(ps.trails, serial.trails))
+        print(f"{workers:4d} workers {rate:8.2f} steps/sec  {rate / baseline:5.2f}x  "
+              f"({'identical' if same else 'MISMATCH'})")
+    # Per-step synchronisation cost, where the work is negligible
+    np.random.seed(42)
+    with SharedParticleSystem(check, 0.05, 20, 50, 0.99, 0, trails=False, workers=max(counts)) as ps:
+        ps.update(0.0)
+        start = time.perf_counter()
+        for step in range(1, 200):
+            ps.update(step * 0.05)
+        print(f"{check} particles, {max(counts)} workers: {(time.perf_counter() - start) / 199 * 1e6:.0f} us/step")
+    check_viz3()
+
+
+def check_viz3(workers=2, frames=5):
+    # End to end: viz3.py --workers exporting a few frames, in a fresh interpreter where
+    # viz3 runs as __main__ and is imported again here as viz3
+    import subprocess
+    import sys
+    import tempfile
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "viz3.py")
+    with tempfile.TemporaryDirectory(prefix="viz3_workers_") as directory:
+        out = os.path.join(directory, "check.gif")
+        result = subprocess.run([sys.executable, script, "--workers", str(workers), "--frames", str(frames),
+                                 "--export", out], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                env=dict(os.environ, MPLBACKEND="Agg"))
+        if result.returncode or not os.path.exists(out) or not os.path.getsize(out):
+            raise RuntimeError(f"viz3.py --workers {workers} --export failed:\n{result.stderr.decode(errors='replace')}")
+    print(f"viz3.py --workers {workers} --export: {frames} frames written")
+
+
+if __name__ == "__main__":
+    benchmark()
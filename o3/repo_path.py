@@ -0,0 +1,9 @@
+# Puts the repository root on sys.path, so the scripts here can import the shared
+# anim_export module whether they are run from the root, from this directory or elsewhere.
+# Imported for that side effect, before anim_export.
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
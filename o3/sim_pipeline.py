@@ -0,0 +1,230 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Runs a ParticleSystem on a background thread, ahead of the drawing, into a ring of
+# preallocated snapshots. In "latest" mode (the interactive window) the simulation is paced
+# at `rate` steps per second and never waits for the renderer: latest() hands over the
+# newest snapshot and drops any older ones, and when the ring is full the producer reuses
+# the oldest unread snapshot. In "every" mode (export) the simulation runs as fast as it
+# can, waits whenever the ring is full, and next() hands over every step in order.
+# NumPy releases the GIL for large array operations, so with many particles stepping
+# overlaps drawing.
+
+
+class Snapshot:
+    # One step's state, copied out of the system: t, a1, a2, positions, velocities, trails
+    def __init__(self, ps):
+        self.t = 0.0
+        self.a1 = np.empty(2, ps.positions.dtype)
+        self.a2 = np.empty(2, ps.positions.dtype)
+        self.positions = np.empty_like(ps.positions)
+        self.velocities = np.empty_like(ps.velocities)
+        self.trails = np.empty((ps.num_particles, ps.trail_length, 2), ps.positions.dtype) \
+            if ps.trail_store is not None else None
+
+    def fill(self, t, a1, a2, positions, velocities, trails):
+        self.t = t
+        self.a1[:] = a1
+        self.a2[:] = a2
+        np.copyto(self.positions, positions)
+        np.copyto(self.velocities, velocities)
+        if trails is not None:
+            np.copyto(self.trails, trails)
+
+    def state(self):
+        # The same tuple as ParticleSystem.update, plus t first
+        return self.t, self.a1, self.a2, self.positions, self.velocities, self.trails
+
+
+class SimulationPipeline:
+    # Steps ps at t = start * dt, (start + 1) * dt, ... for `steps` steps (None: until
+    # close()). depth is the number of snapshots the producer can be ahead; one more is
+    # held by the renderer and one is being written. Counters: produced, consumed,
+    # dropped (stepped but never drawn), and the current and maximum queue depth.
+    def __init__(self, ps, dt, depth=4, mode="latest", rate=None, steps=None, start=0):
+        if mode not in ("latest", "every"):
+            raise ValueError(f"unknown mode {mode!r}")
+        if depth < 1:
+            raise ValueError("depth must be at least 1")
+        self.ps = ps
+        self.dt = dt
+        self.depth = depth
+        self.mode = mode
+        self.rate = rate
+        self.steps = steps
+        self.start = start
+        self.slots = [Snapshot(ps) for _ in range(depth + 2)]
+        self.free = deque(range(len(self.slots)))
+        self.ready = deque()
+        self.held = None
+        self.produced = self.consumed = self.dropped = self.max_depth = 0
+        self.finished = False
+        self.error = None
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.thread = threading.Thread(target=self._produce, daemon=True)
+        self.thread.start()
+
+    @property
+    def queue_depth(self):
+        return len(self.ready)
+
+    def stats(self):
+        with self.condition:
+            return {"produced": self.produced, "consumed": self.consumed, "dropped": self.dropped,
+                    "queue_depth": len(self.ready), "max_depth": self.max_depth, "capacity": self.depth}
+
+    def _acquire(self):
+        # A slot to write the next step into, or None when stopping
+        with self.condition:
+            while True:
+                if self.stopping:
+                    return None
+                if self.free and len(self.ready) < self.depth:
+                    return self.free.popleft()
+                if self.mode == "latest" and self.ready:
+                    self.dropped += 1  # The renderer is behind: overwrite the oldest unread step
+                    return self.ready.popleft()
+                self.condition.wait()
+
+    def _produce(self):
+        step = self.start
+        interval = 1 / self.rate if self.rate else 0.0
+        deadline = time.perf_counter()
+        try:
+            while self.steps is None or step < self.start + self.steps:
+                if interval:
+                    deadline += interval
+                    delay = deadline - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    elif delay < -self.depth * interval:
+                        deadline = time.perf_counter()  # Fell behind real time; don't catch up in a burst
+                slot = self._acquire()
+                if slot is None:
+                    return
+                t = step * self.dt
+                self.slots[slot].fill(t, *self.ps.update(t))
+                step += 1
+                with self.condition:
+                    self.ready.append(slot)
+                    self.produced += 1
+                    self.max_depth = max(self.max_depth, len(self.ready))
+                    self.condition.notify_all()
+        except BaseException as error:
+            self.error = error
+        finally:
+            with self.condition:
+                self.finished = True
+                self.condition.notify_all()
+
+    def _take(self, newest):
+        with self.condition:
+            while not self.ready and not self.finished and (newest is False or self.held is None):
+                self.condition.wait()
+            if self.error is not None:
+                raise self.error
+            if not self.ready:
+                if self.held is None or newest is False:
+                    raise EOFError("the simulation has finished")
+                return self.slots[self.held]  # Nothing new yet: draw the same step again
+            if newest:
+                slot = self.ready.pop()
+                self.dropped += len(self.ready)
+                self.free.extend(self.ready)
+                self.ready.clear()
+            else:
+                slot = self.ready.popleft()
+            if self.held is not None:
+                self.free.append(self.held)
+            self.held = slot
+            self.consumed += 1
+            self.condition.notify_all()
+            return self.slots[slot]
+
+    def latest(self):
+        # The newest step (waiting only for the first one); older unread steps are dropped.
+        # The snapshot is valid until the next latest() or next() call.
+        return self._take(newest=True)
+
+    def next(self):
+        # The next step in order, waiting for it; raises EOFError after the last step
+        return self._take(newest=False)
+
+    def close(self):
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        self.thread.join()
+
+
+def benchmark(counts=(300, 10000), depths=(1, 2, 4, 8), seconds=4.0, rate=1000 / 30, dt=0.05):
+    # Drawing as viz3 does (scatter and trails on an Agg canvas) as fast as possible for
+    # `seconds`: inline, the simulation advances one step per drawn frame; with the
+    # pipeline in "latest" mode it is paced at `rate` steps/sec whatever the drawing costs.
+    # Then checks that "every" mode hands over exactly the inline sequence of steps.
+    import hashlib
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from viz3 import ParticleSystem, TrailRenderer
+
+    def system(n):
+        np.random.seed(42)
+        return ParticleSystem(n, dt, 20, 50, 0.99, 20)
+
+    print(f"{'particles':>9s} {'mode':>12s} {'drawn/sec':>10s} {'steps/sec':>10s} {'dropped':>8s} {'max depth':>10s}")
+    for n in counts:
+        for depth in (None,) + tuple(depths):
+            ps = system(n)
+            fig, ax = plt.subplots(figsize=(8, 8))
+            canvas = FigureCanvasAgg(fig)
+            ax.set_xlim(-20, 20)
+            ax.set_ylim(-20, 20)
+            scat = ax.scatter(ps.positions[:, 0], ps.positions[:, 1], s=10)
+            trails = TrailRenderer(ax, ps.trails)
+            pipeline = None if depth is None else SimulationPipeline(ps, dt, depth, "latest", rate)
+            drawn = 0
+            start = time.perf_counter()
+            while time.perf_counter() - start < seconds:
+                if pipeline is None:
+                    _, _, positions, _, trail_points = ps.update(drawn * dt)
+                else:
+                    _, _, _, positions, _, trail_points = pipeline.latest().state()
+                scat.set_offsets(positions)
+                trails.update(trail_points)
+                canvas.draw()
+                drawn += 1
+            elapsed = time.perf_counter() - start
+            plt.close(fig)
+            if pipeline is None:
+                print(f"{n:9d} {'inline':>12s} {drawn / elapsed:10.1f} {drawn / elapsed:10.1f} {'-':>8s} {'-':>10s}")
+                continue
+            pipeline.close()
+            stats = pipeline.stats()
+            print(f"{n:9d} {f'depth {depth}':>12s} {drawn / elapsed:10.1f} {stats['produced'] / elapsed:10.1f} "
+                  f"{stats['dropped'] / max(1, stats['produced']):7.0%} {stats['max_depth']:10d}")
+
+    digests = []
+    for piped in (False, True):
+        ps = system(1000)
+        digest = hashlib.sha256()
+        pipeline = SimulationPipeline(ps, dt, 4, "every", steps=300) if piped else None
+        for step in range(300):
+            if pipeline is None:
+                state = ps.update(step * dt)
+            else:
+                state = pipeline.next().state()[1:]
+            for array in state:
+                digest.update(array.tobytes())
+        digests.append(digest.digest())
+        if pipeline is not None:
+            pipeline.close()
+            assert pipeline.stats()["dropped"] == 0
+    print(f"every mode: 300 steps {'identical to' if digests[0] == digests[1] else 'MISMATCH with'} inline")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,98 @@
+import argparse, csv, itertools, os, sys, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from game_3shot import Combatant
+from game_sim import POLICIES, simulate
+
+
+def config_grid(hps, attacks, defenses, heal_counts):
+    return [Combatant(f"{hp}/{atk}/{dfn}/{heals}", hp, atk, dfn, heal_count=heals)
+            for hp, atk, dfn, heals in itertools.product(hps, attacks, defenses, heal_counts)]
+
+
+def run_matchup(i, j, player, enemy, fights, policy, seed_seq):
+    result = simulate(fights, POLICIES[policy], player=player, enemy=enemy,
+                      seed=np.random.default_rng(seed_seq))
+    return i, j, np.count_nonzero(result.outcome == 1)
+
+
+def run_tournament(configs, fights, policy="aggressive", seed=0, workers=None, progress=True):
+    # One RNG stream per matchup, spawned from the root seed, so the matrix
+    # does not depend on how matchups are spread over workers.
+    n = len(configs)
+    pairs = list(itertools.product(range(n), repeat=2))
+    streams = np.random.SeedSequence(seed).spawn(len(pairs))
+    wins = np.zeros((n, n), dtype=np.int64)
+    step = max(1, len(pairs) // 100)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_matchup, i, j, configs[i], configs[j], fights, policy, ss)
+                   for (i, j), ss in zip(pairs, streams)]
+        for done, future in enumerate(as_completed(futures), 1):
+            i, j, w = future.result()
+            wins[i, j] = w
+            if progress and (done % step == 0 or done == len(pairs)):
+                print(f"\r{done}/{len(pairs)} matchups", end="", file=sys.stderr, flush=True)
+    if progress:
+        print(file=sys.stderr)
+    return wins / fights
+
+
+def write_matrix(path, configs, rates):
+    base, _ = os.path.splitext(path)
+    np.save(base + ".npy", rates.astype(np.float32))
+    with open(base + ".csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["player \\ enemy"] + [c.name for c in configs])
+        for config, row in zip(configs, rates):
+            writer.writerow([config.name] + [f"{r:.6f}" for r in row])
+
+
+def benchmark(configs, fights, policy, seed):
+    cores = os.cpu_count() or 1
+    counts = sorted({1, cores} | {2 ** k for k in range(1, cores.bit_length()) if 2 ** k < cores})
+    total = len(configs) ** 2 * fights
+    baseline = None
+    for workers in counts:
+        start = time.perf_counter()
+        rates = run_tournament(configs, fights, policy, seed, workers, progress=False)
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline = rates
+        same = "identical" if np.array_equal(rates, baseline) else "MISMATCH"
+        print(f"{workers:3d} workers: {total / elapsed:14,.0f} fights/sec  ({same})")
+
+
+def parse_ints(text):
+    return [int(v) for v in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-robin Combatant tournament across all cores")
+    parser.add_argument("--hp", type=parse_ints, default=[80, 100, 120])
+    parser.add_argument("--attack", type=parse_ints, default=[15, 20, 25])
+    parser.add_argument("--defense", type=parse_ints, default=[4, 8])
+    parser.add_argument("--heals", type=parse_ints, default=[0, 2])
+    parser.add_argument("--fights", type=int, default=20_000, help="fights per matchup")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="aggressive")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="tournament", help="output path; .npy and .csv are written")
+    parser.add_argument("--benchmark", action="store_true", help="measure fights/sec from 1 to N cores")
+    args = parser.parse_args()
+
+    configs = config_grid(args.hp, args.attack, args.defense, args.heals)
+    if args.benchmark:
+        benchmark(configs, args.fights, args.policy, args.seed)
+        return
+    start = time.perf_counter()
+    rates = run_tournament(configs, args.fights, args.policy, args.seed, args.workers)
+    elapsed = time.perf_counter() - start
+    write_matrix(args.out, configs, rates)
+    total = len(configs) ** 2 * args.fights
+    print(f"{len(configs)} configs, {total} fights in {elapsed:.2f}s ({total / elapsed:,.0f} fights/sec)")
+
+
+if __name__ == '__main__':
+    main()
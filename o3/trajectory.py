@@ -0,0 +1,206 @@
+import json
+import os
+import time
+
+import numpy as np
+
+# On-disk recording of a ParticleSystem run, for replaying or scrubbing it without calling
+# update(). The file is a HEADER_SIZE-byte header (MAGIC, then JSON padded with spaces)
+# followed by one fixed-size record per step: the time, the two attractors, positions and
+# velocities. The writer collects records into a chunk in memory and writes each chunk
+# with one write() call; the reader maps the file with np.memmap, so a step's arrays are
+# views of the page cache and reading a frame copies nothing.
+MAGIC = b"PTRAJ1\n"
+HEADER_SIZE = 4096
+
+
+def record_dtype(num_particles, dtype=np.float64):
+    dtype = np.dtype(dtype).newbyteorder("<")
+    return np.dtype([("t", "<f8"), ("attractors", dtype, (2, 2)),
+                     ("positions", dtype, (num_particles, 2)), ("velocities", dtype, (num_particles, 2))])
+
+
+def _write_header(f, header):
+    data = MAGIC + json.dumps(header).encode()
+    if len(data) > HEADER_SIZE:
+        raise ValueError("trajectory header too large")
+    f.seek(0)
+    f.write(data.ljust(HEADER_SIZE, b" "))
+
+
+class TrajectoryWriter:
+    # append() one step at a time; close() (or the context manager) writes the last chunk.
+    # The header's step count is rewritten after every chunk, so a run that is killed can
+    # still be read up to its last full chunk.
+    def __init__(self, path, num_particles, dtype=np.float64, chunk_bytes=64 << 20, meta=None):
+        self.path = path
+        self.record = record_dtype(num_particles, dtype)
+        self.header = {"num_particles": num_particles, "dtype": np.dtype(dtype).str, "steps": 0,
+                       "meta": meta or {}}
+        self.chunk = np.zeros(max(1, chunk_bytes // self.record.itemsize), self.record)
+        self.filled = 0
+        self.steps = 0
+        self.file = open(path, "wb")
+        _write_header(self.file, self.header)
+
+    def append(self, t, a1, a2, positions, velocities):
+        row = self.chunk[self.filled]
+        row["t"] = t
+        row["attractors"][0] = a1
+        row["attractors"][1] = a2
+        row["positions"] = positions
+        row["velocities"] = velocities
+        self.filled += 1
+        self.steps += 1
+        if self.filled == len(self.chunk):
+            self.flush()
+
+    def flush(self):
+        if not self.filled:
+            return
+        self.file.seek(0, os.SEEK_END)
+        self.file.write(self.chunk[:self.filled].data)
+        self.filled = 0
+        self.header["steps"] = self.steps
+        _write_header(self.file, self.header)
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Trajectory:
+    # A recording opened read-only. t (steps,), attractors (steps, 2, 2), positions and
+    # velocities (steps, n, 2) are memmap views over the whole file; frame(step) and
+    # trails(step, length) slice them without copying.
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read(HEADER_SIZE)
+        if not data.startswith(MAGIC):
+            raise ValueError(f"{path} is not a trajectory recording")
+        self.header = json.loads(data[len(MAGIC):])
+        self.num_particles = self.header["num_particles"]
+        self.meta = self.header["meta"]
+        self.steps = self.header["steps"]
+        if self.steps < 1:
+            raise ValueError(f"{path} has no recorded steps")
+        record = record_dtype(self.num_particles, self.header["dtype"])
+        self.records = np.memmap(path, dtype=record, mode="r", offset=HEADER_SIZE, shape=(self.steps,))
+        self.t = self.records["t"]
+        self.attractors = self.records["attractors"]
+        self.positions = self.records["positions"]
+        self.velocities = self.records["velocities"]
+
+    def __len__(self):
+        return self.steps
+
+    def frame(self, step):
+        # (t, a1, a2, positions, velocities), the same as ParticleSystem.update returns
+        # without the trails
+        a1, a2 = self.attractors[step]
+        return self.t[step], a1, a2, self.positions[step], self.velocities[step]
+
+    def trails(self, step, length):
+        # (n, length, 2), oldest first, like ParticleSystem.trails: the positions of the
+        # `length` steps up to `step`. A view, except within `length` steps of the start,
+        # where the first recorded positions are repeated to fill the trail.
+        first = step - length + 1
+        if first >= 0:
+            window = self.positions[first:step + 1]
+        else:
+            window = np.concatenate([np.repeat(self.positions[:1], -first, axis=0), self.positions[:step + 1]])
+        return window.transpose(1, 0, 2)
+
+    def close(self):
+        # Release the mapping (views handed out keep it alive until they are freed)
+        self.records = self.t = self.attractors = self.positions = self.velocities = None
+
+
+def record(ps, path, steps, dt, progress=True):
+    # Steps ps (a ParticleSystem) `steps` times from t = 0, as viz3's animation advances it,
+    # recording the state after each step. Returns (seconds, bytes written).
+    start = time.perf_counter()
+    with TrajectoryWriter(path, ps.num_particles, ps.positions.dtype, meta={"dt": dt}) as writer:
+        for step in range(steps):
+            t = step * dt
+            a1, a2, positions, velocities, _ = ps.update(t)
+            writer.append(t, a1, a2, positions, velocities)
+            if progress and step % 100 == 99:
+                print(f"\r{step + 1}/{steps} steps", end="", flush=True)
+    if progress:
+        print()
+    return time.perf_counter() - start, os.path.getsize(path)
+
+
+def benchmark(num_particles=100000, steps=500, seeks=1000, directory=None):
+    # Recording and scrubbing a run, in a temporary file:
+    # - write: TrajectoryWriter fed the same arrays every step, against one plain write()
+    #   of the same number of bytes; both include the final fsync
+    # - record: stepping and recording, against stepping alone
+    # - seek: frame(step) at random steps (touching every value), against recomputing the
+    #   run up to that step
+    import tempfile
+    from viz3 import ParticleSystem
+    with tempfile.TemporaryDirectory(prefix="trajectory_", dir=directory) as directory:
+        path = os.path.join(directory, "run.traj")
+        np.random.seed(42)
+        ps = ParticleSystem(num_particles, 0.05, 20, 50, 0.99, 0, trail_store=None)
+        a1, a2, positions, velocities, _ = ps.update(0.0)
+
+        start = time.perf_counter()
+        with TrajectoryWriter(path, num_particles) as writer:
+            for step in range(steps):
+                writer.append(step * 0.05, a1, a2, positions, velocities)
+            writer.flush()
+            os.fsync(writer.file.fileno())
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+        print(f"{num_particles} particles x {steps} steps, {size / 2 ** 20:.0f} MiB")
+        print(f"write   {size / elapsed / 2 ** 20:8.0f} MiB/s  {steps / elapsed:8.0f} steps/sec")
+        block = np.zeros(64 << 20, np.uint8)
+        start = time.perf_counter()
+        with open(os.path.join(directory, "plain"), "wb") as f:
+            for _ in range(size // len(block)):
+                f.write(block)
+            f.write(block[:size % len(block)])
+            os.fsync(f.fileno())
+        plain = time.perf_counter() - start
+        os.remove(os.path.join(directory, "plain"))
+        print(f"plain   {size / plain / 2 ** 20:8.0f} MiB/s  (one write() per 64 MiB)")
+
+        np.random.seed(42)
+        ps = ParticleSystem(num_particles, 0.05, 20, 50, 0.99, 0, trail_store=None)
+        start = time.perf_counter()
+        for step in range(steps):
+            ps.update(step * 0.05)
+        stepping = steps / (time.perf_counter() - start)
+        np.random.seed(42)
+        ps = ParticleSystem(num_particles, 0.05, 20, 50, 0.99, 0, trail_store=None)
+        elapsed, _ = record(ps, path, steps, 0.05, progress=False)
+        print(f"record  {steps / elapsed:8.1f} steps/sec  (stepping alone {stepping:.1f} steps/sec)")
+
+        trajectory = Trajectory(path)
+        assert np.array_equal(trajectory.positions[-1], ps.positions)
+        assert np.array_equal(trajectory.velocities[-1], ps.velocities)
+        order = np.random.RandomState(0).randint(0, steps, seeks)
+        start = time.perf_counter()
+        for step in order:
+            t, a1, a2, positions, velocities = trajectory.frame(step)
+            positions.sum()
+            velocities.sum()
+        seek = (time.perf_counter() - start) / seeks
+        print(f"seek    {seek * 1e3:8.3f} ms per random frame; recomputing the average step "
+              f"{steps / 2:.0f} takes {steps / 2 / stepping * 1e3:.0f} ms ({steps / 2 / stepping / seek:.0f}x)")
+        trajectory.close()
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,7 +1,14 @@
+import argparse
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 import numpy as np
 import random
+import repo_path  # noqa: F401  (puts the repository root on sys.path for anim_export)
+from anim_export import add_export_argument, export
+
+parser = argparse.ArgumentParser(description="Growing citation network")
+add_export_argument(parser)
+args = parser.parse_args()
 
 plt.style.use('dark_background')
 num_nodes = 50
@@ -85,5 +92,8 @@ def update(frame):
     ax.text(0.5, 0.95, f'Year: {int(t)}', transform=ax.transAxes,
             ha='center', va='center', fontsize=20, color='w')
 
-ani = animation.FuncAnimation(fig, update, frames=frames, interval=50)
-plt.show()
+if args.export:
+    export(fig, update, frames, args.export, fps=args.fps or 20)
+else:
+    ani = animation.FuncAnimation(fig, update, frames=frames, interval=50)
+    plt.show()
@@ -1,6 +1,16 @@
+import argparse, sys, time
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
+import repo_path  # noqa: F401  (puts the repository root on sys.path for anim_export)
+from anim_export import add_export_argument, export
+
+parser = argparse.ArgumentParser(description="Particle swirl")
+parser.add_argument("--start", type=int, default=0, help="frame to start from")
+parser.add_argument("--benchmark", action="store_true",
+                    help="time seeking and bulk evaluation against stepping frame by frame")
+add_export_argument(parser)
+args = parser.parse_args()
 
 N = 500
 r_particles = np.random.uniform(0.1, 10, N)
@@ -8,10 +18,95 @@ theta_particles = np.random.uniform(0, 2*np.pi, N)
 colors = np.random.rand(N)
 x_particles = r_particles * np.cos(theta_particles)
 y_particles = r_particles * np.sin(theta_particles)
+theta_line = np.linspace(0, 10*np.pi, 1000)
+
+
+class SwirlFrames:
+    # Any frame of the animation straight from its index. Particle i turns by
+    # w_i = 0.02 / (r_i + 0.1) per frame, and frame 0 is drawn after the first turn, so at
+    # frame k it is at r_i * exp(1j * (theta_i + (k + 1) * w_i)) as a complex number. Frames
+    # are evaluated a block at a time: the block's first positions times a table of
+    # exp(1j * j * w_i) for j < block, computed once, so a block of particles is one
+    # (frames x particles) complex multiply. The spiral's radius is
+    # a * theta + b * sin(c * theta + t) with t = k / 10; by the angle-addition identity each
+    # point is P + Q * cos(t) + R * sin(t) with P, Q and R computed once, so a block of the
+    # line is one (frames x 3) @ (3 x points) product.
+    def __init__(self, r, theta, theta_line, a=0.2, b=5, c=10, block=64):
+        self.r = r
+        self.theta = theta
+        self.omega = 0.02 / (r + 0.1)
+        self.block = block
+        self.turns = np.exp(1j * np.arange(block)[:, None] * self.omega)
+        # Rows P, Q, R: the x coordinates of all points, then the y coordinates
+        around = np.concatenate((np.cos(theta_line), np.sin(theta_line)))
+        self.line_terms = np.array([np.tile(a * theta_line, 2), np.tile(b * np.sin(c * theta_line), 2),
+                                    np.tile(b * np.cos(c * theta_line), 2)]) * around
+        self.cached = None  # (first frame, offsets, line) of the last evaluated block
+
+    def evaluate(self, first, count=None):
+        # Frames first .. first + count - 1 (default: a block) as (count, N, 2) particle
+        # offsets and (count, 2, points) spiral x and y
+        count = count or self.block
+        turns = self.turns if count <= self.block else np.exp(1j * np.arange(count)[:, None] * self.omega)
+        start = self.r * np.exp(1j * (self.theta + (first + 1) * self.omega))
+        offsets = (start * turns[:count]).view(np.float64).reshape(count, len(self.r), 2)
+        t = np.arange(first, first + count) / 10.0
+        line = np.column_stack((np.ones(count), np.cos(t), np.sin(t))) @ self.line_terms
+        return offsets, line.reshape(count, 2, -1)
+
+    def frame(self, k):
+        # (offsets, (x, y)) for frame k; views into the cached block
+        cached = self.cached
+        if cached is None or not cached[0] <= k < cached[0] + len(cached[1]):
+            cached = self.cached = (k, *self.evaluate(k))
+        i = k - cached[0]
+        return cached[1][i], cached[2][i]
+
+
+swirl = SwirlFrames(r_particles, theta_particles, theta_line)
+
+
+def benchmark(frames=1000, seeks=(1000, 100000, 10000000)):
+    # Stepping, as the animation used to: theta advanced once per frame and the line
+    # recomputed with full trig calls. Against SwirlFrames: seeking to frame k evaluates one
+    # frame; bulk evaluation of `frames` frames goes block by block.
+    def stepped(count):
+        theta = theta_particles.copy()
+        for frame in range(count):
+            theta += 0.02 / (r_particles + 0.1)
+            offsets = np.c_[r_particles * np.cos(theta), r_particles * np.sin(theta)]
+            t = frame / 10.0
+            r_line = 0.2 * theta_line + 5 * np.sin(10 * theta_line + t)
+            x_line, y_line = r_line * np.cos(theta_line), r_line * np.sin(theta_line)
+        return offsets, np.array([x_line, y_line])
+
+    start = time.perf_counter()
+    expected = stepped(frames)
+    step_time = (time.perf_counter() - start) / frames
+    evaluator = SwirlFrames(r_particles, theta_particles, theta_line)
+    start = time.perf_counter()
+    for k in range(frames):
+        evaluator.frame(k)
+    bulk_time = (time.perf_counter() - start) / frames
+    print(f"{'frames':>10s} {'stepping':>12s} {'seek':>10s} {'speedup':>9s}")
+    for k in seeks:
+        start = time.perf_counter()
+        SwirlFrames(r_particles, theta_particles, theta_line, block=1).frame(k - 1)
+        seek = time.perf_counter() - start
+        print(f"{k:10d} {k * step_time * 1e3:9.1f} ms {seek * 1e3:7.2f} ms {k * step_time / seek:8.0f}x")
+    print(f"bulk: {step_time * 1e6:.0f} us/frame stepping, {bulk_time * 1e6:.0f} us/frame in blocks of "
+          f"{evaluator.block} ({step_time / bulk_time:.1f}x)")
+    offsets, line = evaluator.frame(frames - 1)
+    print(f"frame {frames - 1}: closed form vs stepped, max difference {np.abs(offsets - expected[0]).max():.1e} "
+          f"(particles), {np.abs(line - expected[1]).max():.1e} (line)")
+
+
+if args.benchmark:
+    benchmark()
+    sys.exit()
 
 fig, ax = plt.subplots(figsize=(8, 8))
 scat = ax.scatter(x_particles, y_particles, c=colors, cmap='hsv', s=10, animated=True)
-theta_line = np.linspace(0, 10*np.pi, 1000)
 line, = ax.plot([], [], lw=2, color='white')
 ax.set_xlim(-12, 12)
 ax.set_ylim(-12, 12)
@@ -20,19 +115,14 @@ fig.patch.set_facecolor('black')
 ax.axis('off')
 
 def update(frame):
-    global theta_particles
-    theta_particles += 0.02 / (r_particles + 0.1)
-    x_particles = r_particles * np.cos(theta_particles)
-    y_particles = r_particles * np.sin(theta_particles)
-    scat.set_offsets(np.c_[x_particles, y_particles])
-    
-    t = frame / 10.0
-    a, b, c = 0.2, 5, 10
-    r_line = a * theta_line + b * np.sin(c * theta_line + t)
-    x_line = r_line * np.cos(theta_line)
-    y_line = r_line * np.sin(theta_line)
+    offsets, (x_line, y_line) = swirl.frame(frame)
+    scat.set_offsets(offsets)
     line.set_data(x_line, y_line)
     return scat, line
 
-ani = FuncAnimation(fig, update, frames=np.arange(0, 1000), interval=30, blit=True)
-plt.show()
+frames = np.arange(args.start, args.start + 1000)
+if args.export:
+    export(fig, update, frames, args.export, fps=args.fps or 33)
+else:
+    ani = FuncAnimation(fig, update, frames=frames, interval=30, blit=True)
+    plt.show()
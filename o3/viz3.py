@@ -1,21 +1,151 @@
+import argparse, time
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgb
+from matplotlib.image import AxesImage
+import repo_path  # noqa: F401  (puts the repository root on sys.path for anim_export)
+from anim_export import add_export_argument, export
+import barnes_hut
+from trajectory import Trajectory, record
+
+class TrailBuffer:
+    # Ring buffer of each particle's last `length` positions, stored time-major as
+    # (2 * length, n, 2). Every position is written twice, at head and head + length, so the
+    # trail in order (oldest first) is always the contiguous rows head + 1 .. head + length:
+    # ordered() is a view, and push() writes 2n values whatever the trail length. buffer is
+    # an existing (2 * length, n, 2) array to keep the trail in, already filled.
+    def __init__(self, positions, length, buffer=None):
+        self.length = length
+        self.buffer = np.repeat(positions[None], 2 * length, axis=0) if buffer is None else buffer
+        self.head = length - 1  # Row of the newest position
+
+    def push(self, positions):
+        head = (self.head + 1) % self.length
+        self.buffer[head] = positions
+        self.buffer[head + self.length] = positions
+        self.head = head
+
+    def ordered(self):
+        # (length, n, 2), oldest first. A view: it is only valid until the next push.
+        start = self.head + 1
+        return self.buffer[start:start + self.length]
+
+
+class ShiftTrails:
+    # The original trail store, shifting every point back one slot per step; kept as the
+    # benchmark baseline for TrailBuffer
+    def __init__(self, positions, length):
+        self.trails = np.repeat(positions[:, None, :], length, axis=1)
+
+    def push(self, positions):
+        self.trails[:, :-1, :] = self.trails[:, 1:, :]
+        self.trails[:, -1, :] = positions
+
+    def ordered(self):
+        return self.trails.transpose(1, 0, 2)
+
 
 class ParticleSystem:
-    def __init__(self, num_particles, dt, boundary, G, damping, trail_length):
+    # dtype=np.float32 halves memory traffic at large N; trail_store=None keeps no trails.
+    # self_gravity is the total mass of the particles (the attractors have mass 1): when
+    # set, the particles also attract each other, through a Barnes-Hut tree with opening
+    # angle theta (see barnes_hut.py). positions and velocities, if given, are the state
+    # arrays to step in place (e.g. views of shared memory) instead of a random start.
+    def __init__(self, num_particles, dt, boundary, G, damping, trail_length, trail_store=TrailBuffer,
+                 dtype=np.float64, self_gravity=0.0, theta=0.5, positions=None, velocities=None):
         self.num_particles = num_particles
         self.dt = dt
         self.boundary = boundary
         self.G = G
         self.damping = damping
         self.epsilon = 0.1
+        self.self_gravity = self_gravity
+        self.theta = theta
         self.trail_length = trail_length
-        self.positions = np.random.uniform(-boundary / 2, boundary / 2, (num_particles, 2))
-        self.velocities = np.random.uniform(-1, 1, (num_particles, 2))
-        self.trails = np.repeat(self.positions[:, None, :], trail_length, axis=1)
+        if positions is None:
+            positions = np.random.uniform(-boundary / 2, boundary / 2, (num_particles, 2)).astype(dtype)
+            velocities = np.random.uniform(-1, 1, (num_particles, 2)).astype(dtype)
+        self.positions = positions
+        self.velocities = velocities
+        self.trail_store = trail_store(self.positions, trail_length) if trail_store else None
+        # Work buffers for update(): attractors, offsets to each, squared distances, and
+        # the clipped positions with the mask of particles that hit a wall
+        self.a1 = np.empty(2, dtype)
+        self.a2 = np.empty(2, dtype)
+        self.d1 = np.empty_like(self.positions)
+        self.d2 = np.empty_like(self.positions)
+        self.dist1 = np.empty(num_particles, dtype)
+        self.dist2 = np.empty(num_particles, dtype)
+        self.clipped = np.empty_like(self.positions)
+        self.outside = np.empty(self.positions.shape, bool)
+        # x and y column views. Ufuncs that broadcast a (2,) or (n, 1) operand against
+        # (n, 2) go through numpy's buffered loop, which allocates a 64 KiB buffer per call;
+        # working column by column on these views does not.
+        self.columns = [(self.positions[:, i], self.d1[:, i], self.d2[:, i]) for i in range(2)]
+
+    @property
+    def trails(self):
+        # (n, trail_length, 2), oldest point first; a view, valid until the next update
+        return self.trail_store.ordered().transpose(1, 0, 2)
+
+    def _squared_distance(self, d, out, epsilon):
+        # np.sum(d ** 2, axis=1) + epsilon, using self.clipped as scratch
+        square = np.square(d, out=self.clipped)
+        np.add(square[:, 0], square[:, 1], out=out)
+        out += epsilon
 
     def update(self, t):
+        # update_reference fused into preallocated buffers with out= arguments, so a step
+        # allocates no arrays. The operations and their order are the same, so float64
+        # results are bit-identical to update_reference. Constants are cast to the storage
+        # dtype first: a float64 scalar against float32 arrays would go through a buffered
+        # casting loop. Everything returned is a buffer of this system: a1 and a2 as much
+        # as positions, velocities and trails are valid only until the next update, so
+        # copy what must outlive the step (as sim_pipeline's snapshots do).
+        a1, a2, d1, d2, dist1, dist2 = self.a1, self.a2, self.d1, self.d2, self.dist1, self.dist2
+        positions, velocities = self.positions, self.velocities
+        scalar = positions.dtype.type
+        c, s = np.cos(t * 0.5), np.sin(t * 0.5)
+        attractors = ((scalar(8 * c), scalar(-8 * c)), (scalar(6 * s), scalar(-6 * s)))
+        for (position, offset1, offset2), (target1, target2) in zip(self.columns, attractors):
+            np.subtract(target1, position, out=offset1)
+            np.subtract(target2, position, out=offset2)
+        a1[0], a1[1] = attractors[0][0], attractors[1][0]
+        a2[0], a2[1] = attractors[0][1], attractors[1][1]
+        epsilon = scalar(self.epsilon)
+        self._squared_distance(d1, dist1, epsilon)
+        self._squared_distance(d2, dist2, epsilon)
+        f1 = np.multiply(d1, scalar(self.G), out=d1)
+        f2 = np.multiply(d2, scalar(-self.G), out=d2)  # repulsive force from second attractor
+        for _, force1, force2 in self.columns:
+            np.divide(force1, dist1, out=force1)
+            np.divide(force2, dist2, out=force2)
+        force = np.add(f1, f2, out=f1)
+        if self.self_gravity:
+            # The tree is rebuilt every step, so this mode does allocate
+            force += barnes_hut.accelerations(positions, self.self_gravity / self.num_particles, self.G,
+                                              self.epsilon, self.theta)
+
+        dt = scalar(self.dt)
+        velocities += np.multiply(force, dt, out=force)
+        positions += np.multiply(velocities, dt, out=d2)
+
+        # Reflect off the walls: clamp, and reverse the velocity components that were clamped
+        np.clip(positions, scalar(-self.boundary), scalar(self.boundary), out=self.clipped)
+        np.not_equal(positions, self.clipped, out=self.outside)
+        np.copyto(positions, self.clipped)
+        np.negative(velocities, out=velocities, where=self.outside)
+
+        velocities *= scalar(self.damping)
+        if self.trail_store is not None:
+            self.trail_store.push(positions)
+        return a1, a2, positions, velocities, self.trails if self.trail_store is not None else None
+
+    def update_reference(self, t):
+        # The original integrator, allocating its temporaries every step
         a1 = np.array([8 * np.cos(t * 0.5), 6 * np.sin(t * 0.5)])
         a2 = np.array([-8 * np.cos(t * 0.5), -6 * np.sin(t * 0.5)])
         d1 = a1 - self.positions
@@ -38,32 +168,348 @@ class ParticleSystem:
             self.velocities[mask, i] *= -1
 
         self.velocities *= self.damping
-        self.trails[:, :-1, :] = self.trails[:, 1:, :]
-        self.trails[:, -1, :] = self.positions
-        return a1, a2, self.positions, self.velocities, self.trails
+        if self.trail_store is not None:
+            self.trail_store.push(self.positions)
+        return a1, a2, self.positions, self.velocities, self.trails if self.trail_store is not None else None
+
+class TrailRenderer:
+    # Every particle's trail in one LineCollection, fading from transparent at the tail to
+    # `alpha` at the head. Segment k of every trail (joining points k and k + 1) shares an
+    # age and so an alpha, so the collection holds one path per age: all n segments of that
+    # age, separated by NaN rows, which break the line. That is trail_length - 1 paths
+    # rather than a path per segment, which is what Agg's per-path cost scales with.
+    # set_segments keeps float64 arrays without copying, so the paths are views into
+    # self.vertices and update() is two array copies.
+    def __init__(self, ax, trails, color='white', alpha=0.3, lw=1):
+        n, length, _ = trails.shape
+        self.vertices = np.full((length - 1, n, 3, 2), np.nan)  # age, particle, start/end/break, xy
+        self.fill(trails)
+        colors = [(*to_rgb(color), a) for a in np.linspace(alpha / (length - 1), alpha, length - 1)]
+        self.collection = LineCollection(self._paths(), colors=colors, linewidths=lw)
+        ax.add_collection(self.collection)
+        self.shared = np.shares_memory(self.collection.get_paths()[0].vertices, self.vertices)
+
+    def _paths(self):
+        return [age.reshape(-1, 2) for age in self.vertices]
+
+    def fill(self, trails):
+        self.vertices[:, :, 0] = trails[:, :-1].transpose(1, 0, 2)
+        self.vertices[:, :, 1] = trails[:, 1:].transpose(1, 0, 2)
+
+    def update(self, trails):
+        self.fill(trails)
+        if self.shared:
+            self.collection.stale = True
+        else:
+            self.collection.set_segments(self._paths())
+        return self.collection
+
+
+# Segments (particles x (trail length - 1)) above which main() rasterizes the trails with
+# TrailImage instead of drawing them with TrailRenderer
+TRAIL_SEGMENT_BUDGET = 15000
+
+
+class _CanvasImage(AxesImage):
+    # An AxesImage made at the canvas's resolution, origin='lower': while its extent covers
+    # exactly its own size in pixels it goes to the renderer as it is, without resampling
+    def make_image(self, renderer, magnification=1.0, unsampled=False):
+        x0, x1, y0, y1 = self.get_extent()
+        (left, bottom), (right, top) = self.get_transform().transform([(x0, y0), (x1, y1)])
+        height, width = self._A.shape[:2]
+        if not unsampled and magnification == 1 and abs(right - left - width) < 1 and abs(top - bottom - height) < 1:
+            return self._A, round(left), round(bottom), None
+        return super().make_image(renderer, magnification, unsampled)
+
+
+class TrailImage:
+    # The trails rasterized into one RGBA image over extent (x0, x1, y0, y1), at the size the
+    # extent has on the canvas (set the axes' limits and aspect first), for particle counts
+    # where TrailRenderer's Agg segments dominate the frame. A segment is sampled at evenly
+    # spaced points, enough that the longest leaves no gaps (up to max_samples), and
+    # np.bincount adds each sample's share of the segment's length to its pixel; each age's
+    # segments make one density layer, kept in a ring. Alpha fades linearly with age, so a
+    # pixel's summed alpha is `unit` times the sum of (age + 1) * layer, oldest age 0. When the
+    # trails have moved on by one step, every layer ages by one: that sum drops by the plain
+    # sum of the layers, the oldest layer is replaced by the newest segments, and only those
+    # are rasterized. Anything else (the first frame, a dropped or scrubbed step) rebuilds
+    # every layer. Lines are a pixel wide and not antialiased; the layers take
+    # trail_length - 1 float32 images.
+    def __init__(self, ax, trails, extent, color='white', alpha=0.3, max_samples=16):
+        length = trails.shape[1]
+        ax.apply_aspect()
+        (left, bottom), (right, top) = ax.transData.transform([(extent[0], extent[2]), (extent[1], extent[3])])
+        self.width, self.height = max(1, round(right - left)), max(1, round(top - bottom))
+        self.origin = np.array([extent[0], extent[2]])
+        self.scale = np.array([self.width / (extent[1] - extent[0]), self.height / (extent[3] - extent[2])])
+        self.unit = alpha / (length - 1)
+        self.max_samples = max_samples
+        self.layers = np.zeros((length - 1, self.width * self.height), np.float32)
+        self.alpha = np.empty((self.height, self.width), np.float32)
+        self.ends = np.empty((len(trails), 2, 2), trails.dtype)  # The last trails' second and newest points
+        self.rgba = np.zeros((self.height, self.width, 4), np.uint8)
+        self.rgba[..., :3] = np.round(np.array(to_rgb(color)) * 255)
+        # Drawn over the scatter, as the LineCollection is
+        self.image = _CanvasImage(ax, extent=extent, origin='lower', interpolation='nearest', zorder=2)
+        self.rebuild(trails)
+        self._show()
+        ax.add_image(self.image)
+
+    def _density(self, start, end):
+        # Segments start -> end, (n, 2) each in data coordinates, as one layer
+        start = (start - self.origin) * self.scale
+        step = (end - self.origin) * self.scale - start
+        lengths = np.hypot(step[:, 0], step[:, 1])
+        samples = int(min(max(np.ceil(lengths.max(initial=0)), 1), self.max_samples))
+        fractions = np.arange(samples) / samples
+        x = start[:, :1] + step[:, :1] * fractions
+        y = start[:, 1:] + step[:, 1:] * fractions
+        weights = np.broadcast_to((np.maximum(lengths, 1) / samples)[:, None], x.shape)
+        inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        pixels = y[inside].astype(np.int64) * self.width + x[inside].astype(np.int64)
+        return np.bincount(pixels, weights[inside], minlength=self.layers.shape[1])
+
+    def rebuild(self, trails):
+        for age, layer in enumerate(self.layers):
+            layer[:] = self._density(trails[:, age], trails[:, age + 1])
+        self.head = 0  # Slot of the oldest layer
+        self.total = self.layers.sum(axis=0, dtype=np.float64)
+        self.weighted = np.arange(1, len(self.layers) + 1, dtype=np.float64) @ self.layers  # Sum of (age + 1) * layer
+        self.ends[:] = trails[:, [1, -1]]
+
+    def _show(self):
+        # Segments drawn over each other with alphas a_i leave 1 - prod(1 - a_i) of the
+        # color, which for small alphas is 1 - exp(-sum(a_i))
+        alpha = self.alpha
+        np.multiply(self.weighted.reshape(alpha.shape), -self.unit, out=alpha)
+        np.exp(alpha, out=alpha)
+        np.multiply(alpha, -255, out=alpha)
+        np.add(alpha, 255, out=alpha)
+        np.maximum(alpha, 0, out=alpha)  # Rounding can leave the sums a hair below zero
+        self.rgba[..., 3] = alpha
+        self.image.set_data(self.rgba)
+
+    def update(self, trails):
+        # One step on when the oldest point is the last trails' second and the newest but
+        # one is the last trails' newest
+        if np.array_equal(trails[:, [0, -2]], self.ends):
+            self.weighted -= self.total
+            oldest = self.layers[self.head]
+            self.total -= oldest
+            oldest[:] = self._density(trails[:, -2], trails[:, -1])
+            self.total += oldest
+            self.weighted += len(self.layers) * oldest
+            self.head = (self.head + 1) % len(self.layers)
+            self.ends[:] = trails[:, [1, -1]]
+        else:
+            self.rebuild(trails)
+        self._show()
+        return self.image
+
+
+def benchmark_integrator(counts=(10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7), work=10 ** 7):
+    # Steps/sec and bytes allocated per step (tracemalloc peak above the steady state) for
+    # update_reference and the fused update in float64 and float32; no trails. float64 is
+    # checked bit-identical to the reference after the timed steps.
+    import tracemalloc
+    print(f"{'particles':>10s} {'reference':>24s} {'fused float64':>24s} {'fused float32':>24s}")
+    for n in counts:
+        steps = max(3, work // n)
+        row = []
+        for dtype, fused in ((np.float64, False), (np.float64, True), (np.float32, True)):
+            np.random.seed(42)
+            ps = ParticleSystem(n, 0.05, 20, 50, 0.99, 0, trail_store=None, dtype=dtype)
+            update = ps.update if fused else ps.update_reference
+            start = time.perf_counter()
+            for step in range(steps):
+                update(step * 0.05)
+            rate = steps / (time.perf_counter() - start)
+            tracemalloc.start()
+            update(steps * 0.05)
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            update((steps + 1) * 0.05)
+            allocated = tracemalloc.get_traced_memory()[1] - before
+            tracemalloc.stop()
+            row.append(f"{rate:9.1f}/s {allocated / 2 ** 20:9.3f} MiB")
+            if dtype is np.float64:
+                if fused:
+                    assert np.array_equal(ps.positions, reference.positions)
+                    assert np.array_equal(ps.velocities, reference.velocities)
+                else:
+                    reference = ps
+        print(f"{n:10d} {row[0]:>24s} {row[1]:>24s} {row[2]:>24s}")
+
+
+def benchmark_trail_store(num_particles=1000, lengths=(20, 50, 100, 200, 500, 1000), steps=200):
+    # Cost of ParticleSystem.update with the shifting trail store vs the ring buffer
+    print(f"{'trail length':>12s} {'shift copy':>11s} {'ring buffer':>12s}   ({num_particles} particles)")
+    for length in lengths:
+        row = []
+        for store in (ShiftTrails, TrailBuffer):
+            np.random.seed(42)
+            ps = ParticleSystem(num_particles, 0.05, 20, 50, 0.99, length, trail_store=store)
+            start = time.perf_counter()
+            for step in range(steps):
+                ps.update(step * 0.05)
+            row.append((time.perf_counter() - start) / steps * 1e6)
+            trails = ps.trails
+            if store is ShiftTrails:
+                expected = trails.copy()
+        assert np.array_equal(trails, expected)
+        print(f"{length:12d} {row[0]:8.1f} us {row[1]:9.1f} us  ({row[0] / row[1]:.1f}x)")
+
+
+def benchmark_trail_renderer(counts=(300, 1000, 3000, 10000), frames=30, trail_length=20):
+    # Per-frame cost of stepping the system, updating the trails and drawing on an Agg
+    # canvas: one Line2D per particle (the original), TrailRenderer and TrailImage. The
+    # first frame, where TrailImage rasterizes every segment, is drawn before timing.
+    # main() uses TrailImage above TRAIL_SEGMENT_BUDGET segments.
+    print(f"{'particles':>9s} {'Line2D per particle':>20s} {'LineCollection':>15s} {'TrailImage':>12s}")
+    for n in counts:
+        row = []
+        for mode in ("lines", "collection", "image"):
+            np.random.seed(42)
+            ps = ParticleSystem(n, 0.05, 20, 50, 0.99, trail_length)
+            fig, ax = plt.subplots(figsize=(8, 8))
+            canvas = FigureCanvasAgg(fig)
+            ax.set_xlim(-20, 20)
+            ax.set_ylim(-20, 20)
+            if mode == "collection":
+                trails = TrailRenderer(ax, ps.trails)
+            elif mode == "image":
+                trails = TrailImage(ax, ps.trails, (-20, 20, -20, 20))
+            else:
+                lines = [ax.plot(ps.trails[i, :, 0], ps.trails[i, :, 1], lw=1, color='white', alpha=0.3)[0]
+                         for i in range(n)]
+            canvas.draw()
+            start = time.perf_counter()
+            for frame in range(frames):
+                _, _, _, _, trail_points = ps.update(frame * 0.05)
+                if mode == "lines":
+                    for i, line in enumerate(lines):
+                        line.set_data(trail_points[i, :, 0], trail_points[i, :, 1])
+                else:
+                    trails.update(trail_points)
+                canvas.draw()
+            row.append((time.perf_counter() - start) / frames * 1000)
+            plt.close(fig)
+        print(f"{n:9d} {row[0]:17.1f} ms {row[1]:12.1f} ms {row[2]:9.1f} ms  "
+              f"({row[0] / min(row[1:]):.1f}x)")
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Particles between two moving attractors")
+    parser.add_argument("--particles", type=int, default=300)
+    parser.add_argument("--float32", action="store_true", help="store particle state in float32")
+    parser.add_argument("--self-gravity", type=float, default=0.0, metavar="MASS",
+                        help="let the particles attract each other, with this total mass (an attractor is 1)")
+    parser.add_argument("--theta", type=float, default=0.5,
+                        help="Barnes-Hut opening angle for --self-gravity: larger is faster and less accurate")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="step the particles in this many worker processes over shared memory")
+    parser.add_argument("--record", metavar="PATH",
+                        help="step the particles --steps times without drawing, recording every step to PATH")
+    parser.add_argument("--steps", type=int, default=1000, help="steps to --record")
+    parser.add_argument("--play", metavar="PATH",
+                        help="animate a --record recording instead of simulating; the arrow keys scrub "
+                             "(left/right 100 steps, down/up 1000)")
+    parser.add_argument("--start", type=int, default=0, help="step to start --play from")
+    parser.add_argument("--frames", type=int, default=1000, help="steps to animate when simulating")
+    parser.add_argument("--pipeline", type=int, default=0, metavar="DEPTH",
+                        help="step the simulation on a background thread up to DEPTH snapshots ahead of the "
+                             "drawing; the window drops frames when drawing falls behind, --export draws all")
+    parser.add_argument("--benchmark", choices=("renderer", "trails", "integrator", "gravity", "parallel",
+                                                "trajectory", "pipeline"),
+                        help="renderer: time per-particle Line2D trails against one LineCollection; "
+                             "trails: time the shifting trail store against the ring buffer; "
+                             "integrator: time and trace allocations of the fused update; "
+                             "gravity: Barnes-Hut speed and accuracy against the exact sum; "
+                             "parallel: shared-memory stepping from 1 worker to all cores; "
+                             "trajectory: recording write speed and seek time against recomputing; "
+                             "pipeline: drawing and simulation rates with the background pipeline")
+    add_export_argument(parser)
+    args = parser.parse_args()
+    if args.benchmark == "renderer":
+        benchmark_trail_renderer()
+        return
+    if args.benchmark == "trails":
+        benchmark_trail_store()
+        return
+    if args.benchmark == "integrator":
+        benchmark_integrator()
+        return
+    if args.benchmark == "gravity":
+        barnes_hut.benchmark()
+        return
+    if args.benchmark == "parallel":
+        import parallel_particles
+        parallel_particles.benchmark()
+        return
+    if args.benchmark == "trajectory":
+        import trajectory
+        trajectory.benchmark()
+        return
+    if args.benchmark == "pipeline":
+        import sim_pipeline
+        sim_pipeline.benchmark()
+        return
+    if args.workers and args.self_gravity:
+        parser.error("--self-gravity cannot be split across --workers")
+    if args.record and args.steps < 1:
+        parser.error("--steps must be at least 1 to --record")
+
     np.random.seed(42)
-    num_particles = 300
+    num_particles = args.particles
     dt = 0.05
     boundary = 20
     G = 50
     damping = 0.99
     trail_length = 20
-    ps = ParticleSystem(num_particles, dt, boundary, G, damping, trail_length)
+    dtype = np.float32 if args.float32 else np.float64
+    # Recording needs no trails: playback takes them from the recorded positions
+    trail_store = None if args.record else TrailBuffer
+    recording = ps = None
+    if args.play:
+        recording = Trajectory(args.play)
+        if not 0 <= args.start < len(recording):
+            parser.error(f"--start must be below the {len(recording)} steps of {args.play}")
+        positions, initial_trails = recording.positions[0], recording.trails(0, trail_length)
+    elif args.workers:
+        from parallel_particles import SharedParticleSystem
+        ps = SharedParticleSystem(num_particles, dt, boundary, G, damping, trail_length,
+                                  trails=trail_store is not None, dtype=dtype, workers=args.workers)
+    else:
+        ps = ParticleSystem(num_particles, dt, boundary, G, damping, trail_length, trail_store=trail_store,
+                            dtype=dtype, self_gravity=args.self_gravity, theta=args.theta)
+    if args.record:
+        try:
+            seconds, size = record(ps, args.record, args.steps, dt)
+        finally:
+            if args.workers:
+                ps.close()
+        print(f"{args.steps} steps to {args.record} in {seconds:.1f}s ({args.steps / seconds:.1f} steps/sec, "
+              f"{size / seconds / 2 ** 20:.0f} MiB/s)")
+        return
+    if ps is not None:
+        positions, initial_trails = ps.positions, ps.trails
 
     plt.style.use('dark_background')
     fig, ax = plt.subplots(figsize=(8, 8))
-    scat = ax.scatter(ps.positions[:, 0], ps.positions[:, 1], s=10, c='cyan',
+    scat = ax.scatter(positions[:, 0], positions[:, 1], s=10, c='cyan',
                       edgecolors='none', alpha=0.8, cmap='viridis')
     a1_plot, = ax.plot([], [], 'yo', markersize=10)
     a2_plot, = ax.plot([], [], 'mo', markersize=10)
 
-    trail_lines = []
-    for i in range(num_particles):
-        line, = ax.plot(ps.trails[i, :, 0], ps.trails[i, :, 1],
-                        lw=1, color='white', alpha=0.3)
-        trail_lines.append(line)
+    ax.set_xlim(-boundary, boundary)
+    ax.set_ylim(-boundary, boundary)
+    ax.set_aspect('equal')
+    ax.axis('off')
+
+    if len(positions) * (trail_length - 1) > TRAIL_SEGMENT_BUDGET:
+        trails = TrailImage(ax, initial_trails, (-boundary, boundary, -boundary, boundary), color='white', alpha=0.3)
+    else:
+        trails = TrailRenderer(ax, initial_trails, color='white', alpha=0.3, lw=1)
 
     u = np.linspace(0, 2 * np.pi, 400)
     lissajous_line, = ax.plot(10 * np.sin(3 * u), 10 * np.sin(4 * u),
@@ -71,32 +517,74 @@ def main():
 
     time_text = ax.text(-boundary + 1, boundary - 2, '', color='white', fontsize=12)
 
-    ax.set_xlim(-boundary, boundary)
-    ax.set_ylim(-boundary, boundary)
-    ax.set_aspect('equal')
-    ax.axis('off')
+    pipeline = None
+    if args.pipeline and ps is not None:
+        from sim_pipeline import SimulationPipeline
+        # The animation's frames are steps 0, 1, 2, ...: exported, every one of them in
+        # order; in the window, the newest at the time of drawing. Started only once the
+        # artists are built, since they read ps's arrays and the thread steps ps at once.
+        pipeline = SimulationPipeline(ps, dt, args.pipeline, "every" if args.export else "latest",
+                                      rate=None if args.export else 1000 / 30, steps=args.frames if args.export else None)
 
     def animate(frame):
-        t = frame * dt
-        a1, a2, positions, velocities, trails = ps.update(t)
+        if recording is not None:
+            # frame is a recorded step; the arrays are views of the file
+            t, a1, a2, positions, velocities = recording.frame(frame)
+            trail_points = recording.trails(frame, trail_length)
+        elif pipeline is not None:
+            snapshot = pipeline.next() if args.export else pipeline.latest()
+            t, a1, a2, positions, velocities, trail_points = snapshot.state()
+        else:
+            t = frame * dt
+            a1, a2, positions, velocities, trail_points = ps.update(t)
         scat.set_offsets(positions)
         speed = np.linalg.norm(velocities, axis=1)
         scat.set_array(speed)
 
         a1_plot.set_data([a1[0]], [a1[1]])
         a2_plot.set_data([a2[0]], [a2[1]])
-        for i, line in enumerate(trail_lines):
-            line.set_data(trails[i, :, 0], trails[i, :, 1])
+        trail_artist = trails.update(trail_points)
 
         x_liss = 10 * np.sin(3 * u + t * 0.5)
         y_liss = 10 * np.sin(4 * u)
         lissajous_line.set_data(x_liss, y_liss)
 
-        time_text.set_text(f"Time = {t:.2f}")
-        return [scat, a1_plot, a2_plot, lissajous_line, time_text] + trail_lines
+        if pipeline is not None:
+            time_text.set_text(f"Time = {t:.2f}  queue {pipeline.queue_depth}/{pipeline.depth}  "
+                               f"dropped {pipeline.dropped}")
+        else:
+            time_text.set_text(f"Time = {t:.2f}")
+        return [scat, a1_plot, a2_plot, lissajous_line, time_text, trail_artist]
+
+    frames = args.frames if recording is None else range(args.start, len(recording))
+    try:
+        if args.export:
+            export(fig, animate, frames, args.export, fps=args.fps or 33)
+            return
+        if recording is not None:
+            # Loop over the recording from a playhead the arrow keys can move
+            playhead = [args.start]
+            jumps = {"left": -100, "right": 100, "down": -1000, "up": 1000}
+
+            def scrub(event):
+                if event.key in jumps:
+                    playhead[0] = min(max(playhead[0] + jumps[event.key], 0), len(recording) - 1)
+
+            def play():
+                while True:
+                    yield playhead[0]
+                    playhead[0] = (playhead[0] + 1) % len(recording)
 
-    anim = FuncAnimation(fig, animate, frames=1000, interval=30, blit=True)
-    plt.show()
+            fig.canvas.mpl_connect("key_press_event", scrub)
+            frames = play
+        anim = FuncAnimation(fig, animate, frames=frames, interval=30, blit=True, cache_frame_data=False)
+        plt.show()
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+            print("pipeline: " + ", ".join(f"{key} {value}" for key, value in pipeline.stats().items()))
+        if args.workers:
+            ps.close()
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,10 @@
-
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 from matplotlib.animation import FuncAnimation
+import repo_path  # noqa: F401  (puts the repository root on sys.path for anim_export)
+from anim_export import add_export_argument, export
 
 fig = plt.figure(figsize=(10, 8))
 ax = fig.add_subplot(111, projection='3d')
@@ -132,4 +134,10 @@ def extra_info():
 extra_info()
 
 if __name__ == '__main__':
-    plt.show()
+    parser = argparse.ArgumentParser(description="3D dynamic visualization")
+    add_export_argument(parser)
+    args = parser.parse_args()
+    if args.export:
+        export(fig, update, 300, args.export, fps=args.fps or 20)
+    else:
+        plt.show()